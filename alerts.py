@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 
-import sys, time, re, collections
-from omada import Omada
+import sys, time, collections
+from omada import Omada, ContentRenderer
 
 FIELDDEF = collections.OrderedDict([
 	('content',('CONTENT',72)),
 	('time',   ('TIME',   24)),
 ])
 
+RENDERER = ContentRenderer()
+
 def format_date( date ):
 	return time.strftime('%b %e %Y %I:%M:%S %p', time.localtime(date // 1000))
 
@@ -30,13 +32,7 @@ def print_alert( alert ):
 	for key in alert:
 
 		if key == 'content':
-			match = re.search( r'\[([a-z]+):([0-9A-F\-]+)\]', alert[key] )
-			if match:
-				tag = str( match.group(1) )
-				mac = str( match.group(2) )
-				type = 'clientNames' if tag == 'client' else 'deviceNames'
-				name = '[' + alert[type][mac] + ']'
-				alert[key] = alert[key].replace( match.group(0), name )
+			alert[key] = RENDERER.render( alert )
 
 		elif key == 'time':
 			alert[key] = format_date( alert[key] )
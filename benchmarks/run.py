@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+##
+## Benchmark the main Omada operations against a simulated controller.
+##
+## The simulator runs in a separate process, so its work is not counted in the
+## client's time or memory. Each benchmark is timed 'repeat' times and the best
+## run is reported, then run once more under tracemalloc for peak memory.
+##
+##   python3 benchmarks/run.py --sites 4 --clients 5000 --latency 0.002
+##   python3 benchmarks/run.py --only clients --json > before.json
+##
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import multiprocessing
+from urllib.request import urlopen
+
+sys.path.insert( 0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))) )
+
+from omada import Omada, RetryPolicy
+from simulator import createServer
+
+Username = 'admin'
+Password = 'admin'
+
+def serve(ready, kwargs):
+	server = createServer( **kwargs )
+	ready.put( server.server_address[1] )
+	server.serve_forever()
+
+##
+## The simulator running in a child process.
+##
+class Simulator:
+
+	def __init__(self, **kwargs):
+		ready = multiprocessing.Queue()
+		self.process = multiprocessing.Process( target=serve, args=(ready, kwargs), daemon=True )
+		self.process.start()
+		self.url = f'http://127.0.0.1:{ready.get(timeout=60)}'
+
+	def stats(self):
+		with urlopen( self.url + '/_stats' ) as response:
+			return json.load( response )
+
+	def stop(self):
+		self.process.terminate()
+		self.process.join()
+
+##
+## The benchmarks. Each takes a logged-in Omada instance and returns the number of records read.
+##
+def login(omada):
+	client = Omada( baseurl=omada.baseurl, retry=omada.retry )
+	client.login( Username, Password )
+	client.logout()
+	return 0
+
+def sites(omada):
+	return sum( 1 for _ in omada.getSites() )
+
+def devices(omada):
+	return len( omada.getSiteDevices() )
+
+def clients(omada):
+	return sum( 1 for _ in omada.getSiteClients() )
+
+def clientsLimit(omada):
+	return sum( 1 for _ in omada.getSiteClients(limit=100) )
+
+def clientsTyped(omada):
+	return sum( 1 for _ in omada.getSiteClients(typed=True) )
+
+def clientsStream(omada):
+	omada.stream = True
+	try:
+		return sum( 1 for _ in omada.getSiteClients() )
+	finally:
+		omada.stream = False
+
+def clientsPrefetch(omada):
+	omada.prefetch = 4
+	try:
+		return sum( 1 for _ in omada.getSiteClients() )
+	finally:
+		omada.prefetch = 0
+
+def events(omada):
+	return sum( 1 for _ in omada.getSiteEvents() )
+
+def alerts(omada):
+	return sum( 1 for _ in omada.getSiteAlerts() )
+
+def allSiteClients(omada):
+	return sum( 1 for _ in omada.getAllSiteClients() )
+
+def settings(omada):
+	omada.getSiteSettings()
+	return 1
+
+Benchmarks = {
+	'login': login,
+	'sites': sites,
+	'devices': devices,
+	'clients': clients,
+	'clients-limit': clientsLimit,
+	'clients-typed': clientsTyped,
+	'clients-stream': clientsStream,
+	'clients-prefetch': clientsPrefetch,
+	'events': events,
+	'alerts': alerts,
+	'all-site-clients': allSiteClients,
+	'settings': settings,
+}
+
+##
+## Run one benchmark and return its results.
+##
+def measure(name, function, omada, simulator, repeat):
+
+	best = None
+	for _ in range(repeat):
+		before = simulator.stats()
+		started = time.perf_counter()
+		records = function( omada )
+		wall = time.perf_counter() - started
+		after = simulator.stats()
+		if best is None or wall < best[0]:
+			best = (wall, after['requests'] - before['requests'], after['bytes'] - before['bytes'], records)
+
+	tracemalloc.start()
+	try:
+		function( omada )
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+	wall, requests, size, records = best
+	return {
+		'benchmark': name,
+		'wall': wall,
+		'requests': requests,
+		'requestsPerSecond': requests / wall if wall else 0.0,
+		'records': records,
+		'recordsPerSecond': records / wall if wall else 0.0,
+		'bytes': size,
+		'peakMemory': peak,
+	}
+
+def printTable(results):
+
+	columns = (
+		('BENCHMARK',   18, lambda result: result['benchmark']),
+		('WALL (s)',    10, lambda result: f'{result["wall"]:.4f}'),
+		('REQUESTS',    10, lambda result: str(result['requests'])),
+		('REQ/S',       10, lambda result: f'{result["requestsPerSecond"]:.1f}'),
+		('RECORDS',     10, lambda result: str(result['records'])),
+		('RECORDS/S',   12, lambda result: f'{result["recordsPerSecond"]:.0f}'),
+		('PEAK (KiB)',  12, lambda result: f'{result["peakMemory"] / 1024:.0f}'),
+	)
+
+	sys.stdout.write( ''.join(text.ljust(width) for text, width, _ in columns) + '\n' )
+	for result in results:
+		sys.stdout.write( ''.join(value(result).ljust(width) for _, width, value in columns) + '\n' )
+
+def main():
+
+	parser = argparse.ArgumentParser( description='Benchmark Omada operations against a simulated controller.' )
+	parser.add_argument( '--sites', type=int, default=4 )
+	parser.add_argument( '--clients', type=int, default=2000, help='clients per site' )
+	parser.add_argument( '--devices', type=int, default=20, help='devices per site' )
+	parser.add_argument( '--events', type=int, default=5000, help='events per site' )
+	parser.add_argument( '--alerts', type=int, default=500, help='alerts per site' )
+	parser.add_argument( '--latency', type=float, default=0.0, help='seconds added to each request' )
+	parser.add_argument( '--error-rate', type=float, default=0.0, help='fraction of requests that fail with HTTP 503' )
+	parser.add_argument( '--max-page-size', type=int, default=1000, help='largest page the simulator accepts' )
+	parser.add_argument( '--pagesize', type=int, default=1000, help='page size the client starts with' )
+	parser.add_argument( '--repeat', type=int, default=3, help='timed runs per benchmark' )
+	parser.add_argument( '--only', action='append', choices=sorted(Benchmarks), help='run only this benchmark (repeatable)' )
+	parser.add_argument( '--json', action='store_true', help='print results as JSON' )
+	args = parser.parse_args()
+
+	simulator = Simulator( sites=args.sites, clients=args.clients, devices=args.devices, events=args.events, alerts=args.alerts,
+		latency=args.latency, errorRate=args.error_rate, maxPageSize=args.max_page_size )
+
+	try:
+		# Injected errors need retries to get through.
+		retry = RetryPolicy( retries=10, backoff=0.01, maxBackoff=0.1, breakerThreshold=1000 ) if args.error_rate else None
+		omada = Omada( baseurl=simulator.url, pagesize=args.pagesize, retry=retry )
+		omada.login( Username, Password )
+
+		results = [measure(name, Benchmarks[name], omada, simulator, max(1, args.repeat)) for name in (args.only or Benchmarks)]
+		omada.logout()
+	finally:
+		simulator.stop()
+
+	if args.json:
+		json.dump( results, sys.stdout, indent=2 )
+		sys.stdout.write( '\n' )
+	else:
+		printTable( results )
+
+if __name__ == '__main__':
+	main()
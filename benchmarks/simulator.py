@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+##
+## A simulated Omada controller for offline benchmarks.
+##
+## Serves the endpoints the Omada class uses most: /api/info, /login, /logout,
+## /loginStatus, /users/current, /sites, and the paged clients, events, and
+## alerts of each site, plus devices and settings. Data is generated up front
+## from a fixed seed, so runs are repeatable.
+##
+## 'latency' seconds are added to every request, and 'errorRate' is the fraction
+## of requests that fail with HTTP 503. Pages larger than 'maxPageSize' are
+## rejected like a real controller does. GET /_stats returns request counters.
+##
+##   python3 benchmarks/simulator.py --port 8043 --sites 4 --clients 5000
+##
+
+import re
+import json
+import time
+import random
+import argparse
+from threading import Lock
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+OmadacId = 'simulator'
+ApiPath = f'/{OmadacId}/api/v2'
+
+Levels = ('Error', 'Warning', 'Information')
+Modules = ('System', 'Device', 'Client')
+
+def mac(prefix, number):
+	return '{}-{:02X}-{:02X}-{:02X}'.format( prefix, (number >> 16) & 0xff, (number >> 8) & 0xff, number & 0xff )
+
+##
+## The generated data and request counters of a simulated controller.
+##
+class Controller:
+
+	def __init__(self, sites=4, clients=1000, devices=20, events=2000, alerts=200, latency=0.0, errorRate=0.0, maxPageSize=1000, seed=1):
+
+		self.latency = latency
+		self.errorRate = errorRate
+		self.maxPageSize = maxPageSize
+		self.random = random.Random( seed )
+		self.lock = Lock()
+		self.requests = 0
+		self.errors = 0
+		self.bytes = 0
+		self.tokens = set()
+
+		now = int( time.time() * 1000 )
+		self.sites = []
+		self.data = {}
+
+		for index in range(sites):
+
+			name = 'Default' if index == 0 else f'Site {index}'
+			key = f'{index:024x}'
+			self.sites.append( {'id': key, 'key': key, 'name': name, 'region': 'United States', 'timeZone': 'UTC', 'scenario': 'Office', 'type': 0} )
+
+			devices_ = [self.__device(index, number) for number in range(devices)]
+			clients_ = [self.__client(index, number, devices_) for number in range(clients)]
+			self.data[key] = {
+				'devices': devices_,
+				'clients': clients_,
+				'events': [self.__event(index, number, now, clients_, devices_, False) for number in range(events)],
+				'alerts': [self.__event(index, number, now, clients_, devices_, True) for number in range(alerts)],
+				'setting': {'led': {'enable': True}, 'mesh': {'meshEnable': True, 'autoFailoverEnable': True}, 'remoteLog': {'enable': False}},
+			}
+
+	def __device(self, site, number):
+		return {
+			'mac': mac(f'40-ED-{site:02X}', number),
+			'name': f'AP {site}-{number}',
+			'type': 'ap',
+			'model': 'EAP245',
+			'showModel': 'EAP245(US) v3.0',
+			'version': '5.0.6',
+			'ip': f'10.{site}.0.{number % 250 + 2}',
+			'status': 14,
+			'statusCategory': 1,
+			'uptimeLong': self.random.randint(60, 10**7),
+			'cpuUtil': self.random.randint(0, 100),
+			'memUtil': self.random.randint(0, 100),
+			'clientNum': self.random.randint(0, 50),
+		}
+
+	def __client(self, site, number, devices):
+		device = devices[number % len(devices)] if devices else {}
+		return {
+			'id': f'{site:04x}{number:020x}',
+			'mac': mac(f'AC-DE-{site:02X}', number),
+			'name': f'client-{site}-{number}',
+			'hostName': f'client-{site}-{number}',
+			'ip': f'10.{site}.{number // 250 % 250 + 1}.{number % 250 + 2}',
+			'active': True,
+			'wireless': True,
+			'guest': False,
+			'connectDevType': 'ap',
+			'apName': device.get('name'),
+			'apMac': device.get('mac'),
+			'ssid': f'SSID {number % 3}',
+			'networkName': 'LAN',
+			'vid': 1,
+			'channel': self.random.choice( (1, 6, 11, 36, 44, 149) ),
+			'radioId': self.random.randint(0, 1),
+			'wifiMode': 5,
+			'signalLevel': self.random.randint(0, 100),
+			'rssi': self.random.randint(-90, -30),
+			'activity': self.random.randint(0, 10**6),
+			'trafficDown': self.random.randint(0, 10**10),
+			'trafficUp': self.random.randint(0, 10**9),
+			'uptime': self.random.randint(0, 10**6),
+			'lastSeen': 0,
+			'authStatus': 0,
+			'security': 3,
+		}
+
+	def __event(self, site, number, now, clients, devices, alert):
+
+		client = clients[number % len(clients)] if clients else {'mac': mac('AC-DE-FF', number), 'name': 'unknown'}
+		device = devices[number % len(devices)] if devices else {'mac': mac('40-ED-FF', number), 'name': 'unknown'}
+		event = {
+			'id': f'{site:04x}{number:020x}',
+			'time': now - number * 1000,
+			'level': Levels[number % len(Levels)],
+			'module': Modules[number % len(Modules)],
+			'content': f'[client:{client["mac"]}] is connected to [device:{device["mac"]}] with SSID "SSID 0".',
+			'clientNames': {client['mac']: client['name']},
+			'deviceNames': {device['mac']: device['name']},
+		}
+		if alert:
+			event['archived'] = False
+		return event
+
+	##
+	## Return one page of rows in the shape of a paged Omada result.
+	##
+	def page(self, rows, query):
+
+		currentPage = int( query.get('currentPage', 1) )
+		currentSize = int( query.get('currentPageSize', 10) )
+		if currentSize > self.maxPageSize:
+			return {'errorCode': -1001, 'msg': 'Invalid request parameters.'}
+
+		start = query.get('filters.timeStart')
+		end = query.get('filters.timeEnd')
+		if start is not None or end is not None:
+			start = int(start) if start is not None else float('-inf')
+			end = int(end) if end is not None else float('inf')
+			rows = [row for row in rows if start <= row['time'] <= end]
+
+		offset = (currentPage - 1) * currentSize
+		return {'errorCode': 0, 'msg': 'Success.', 'result': {
+			'totalRows': len(rows),
+			'currentPage': currentPage,
+			'currentSize': currentSize,
+			'data': rows[offset:offset+currentSize],
+		}}
+
+	##
+	## Return the response for a request.
+	##
+	## The session token is sent in the 'token' parameter or the Csrf-Token header.
+	##
+	def handle(self, method, path, query, body, token=None):
+
+		if path == '/api/info':
+			return {'errorCode': 0, 'msg': 'Success.', 'result': {'controllerVer': '5.9.31', 'apiVer': '3', 'omadacId': OmadacId}}
+
+		if not path.startswith(ApiPath):
+			return None
+		path = path[len(ApiPath):]
+
+		if path == '/login':
+			token = f'{self.random.getrandbits(64):016x}'
+			with self.lock:
+				self.tokens.add( token )
+			return {'errorCode': 0, 'msg': 'Log in successfully.', 'result': {'roleType': 0, 'token': token}}
+
+		token = query.get('token') or token
+
+		if path == '/loginStatus':
+			return {'errorCode': 0, 'result': {'login': token in self.tokens}}
+
+		if token not in self.tokens:
+			return {'errorCode': -1200, 'msg': 'Session timed out. Please login again.'}
+
+		if path == '/logout':
+			with self.lock:
+				self.tokens.discard( token )
+			return {'errorCode': 0, 'msg': 'Success.'}
+
+		if path == '/users/current':
+			return {'errorCode': 0, 'msg': 'Success.', 'result': {'id': '1', 'name': 'admin', 'roleType': 0, 'privilege': {'all': True, 'sites': [{'key': site['key'], 'name': site['name']} for site in self.sites]}}}
+
+		if path == '/sites':
+			return self.page( self.sites, query )
+
+		match = re.match( r'^/sites/([^/]+)/(clients|devices|events|alerts|setting)$', path )
+		if match is None or match.group(1) not in self.data:
+			return {'errorCode': -1, 'msg': 'General error.'}
+
+		data = self.data[match.group(1)]
+		what = match.group(2)
+
+		if what == 'devices':
+			return {'errorCode': 0, 'msg': 'Success.', 'result': data['devices']}
+
+		if what == 'setting':
+			if method == 'PATCH':
+				for key, value in json.loads( body or b'{}' ).items():
+					if isinstance(value, dict):
+						data['setting'].setdefault( key, {} ).update( value )
+					else:
+						data['setting'][key] = value
+				return {'errorCode': 0, 'msg': 'Success.'}
+			return {'errorCode': 0, 'msg': 'Success.', 'result': data['setting']}
+
+		return self.page( data[what], query )
+
+	def stats(self):
+		with self.lock:
+			return {'requests': self.requests, 'errors': self.errors, 'bytes': self.bytes}
+
+##
+## Serve a Controller over HTTP.
+##
+class Handler(BaseHTTPRequestHandler):
+
+	protocol_version = 'HTTP/1.1'
+	disable_nagle_algorithm = True
+	controller = None
+
+	def log_message(self, format, *args):
+		pass
+
+	def send(self, status, body):
+		self.send_response( status )
+		self.send_header( 'Content-Type', 'application/json;charset=UTF-8' )
+		self.send_header( 'Content-Length', str(len(body)) )
+		self.end_headers()
+		self.wfile.write( body )
+
+	def handle_request(self, method):
+
+		controller = self.controller
+		url = urlparse( self.path )
+		query = {key: values[0] for key, values in parse_qs(url.query).items()}
+		length = int( self.headers.get('Content-Length') or 0 )
+		body = self.rfile.read( length ) if length else b''
+
+		if url.path == '/_stats':
+			return self.send( 200, json.dumps(controller.stats()).encode() )
+
+		if controller.latency:
+			time.sleep( controller.latency )
+
+		with controller.lock:
+			controller.requests += 1
+			failed = controller.errorRate and controller.random.random() < controller.errorRate
+			if failed:
+				controller.errors += 1
+
+		if failed:
+			return self.send( 503, b'Service Unavailable' )
+
+		response = controller.handle( method, url.path, query, body, self.headers.get('Csrf-Token') )
+		if response is None:
+			return self.send( 404, b'Not Found' )
+
+		body = json.dumps( response, separators=(',',':') ).encode()
+		with controller.lock:
+			controller.bytes += len(body)
+		self.send( 200, body )
+
+	def do_GET(self):
+		self.handle_request( 'GET' )
+
+	def do_POST(self):
+		self.handle_request( 'POST' )
+
+	def do_PATCH(self):
+		self.handle_request( 'PATCH' )
+
+##
+## Create an HTTP server for a new Controller. Port 0 picks a free port.
+##
+def createServer(host='127.0.0.1', port=0, **kwargs):
+
+	handler = type( 'BoundHandler', (Handler,), {'controller': Controller(**kwargs)} )
+	server = ThreadingHTTPServer( (host, port), handler )
+	server.daemon_threads = True
+	return server
+
+def main():
+
+	parser = argparse.ArgumentParser( description='Run a simulated Omada controller.' )
+	parser.add_argument( '--host', default='127.0.0.1' )
+	parser.add_argument( '--port', type=int, default=8043 )
+	parser.add_argument( '--sites', type=int, default=4 )
+	parser.add_argument( '--clients', type=int, default=1000, help='clients per site' )
+	parser.add_argument( '--devices', type=int, default=20, help='devices per site' )
+	parser.add_argument( '--events', type=int, default=2000, help='events per site' )
+	parser.add_argument( '--alerts', type=int, default=200, help='alerts per site' )
+	parser.add_argument( '--latency', type=float, default=0.0, help='seconds added to each request' )
+	parser.add_argument( '--error-rate', type=float, default=0.0, help='fraction of requests that fail with HTTP 503' )
+	parser.add_argument( '--max-page-size', type=int, default=1000 )
+	args = parser.parse_args()
+
+	server = createServer( args.host, args.port, sites=args.sites, clients=args.clients, devices=args.devices, events=args.events,
+		alerts=args.alerts, latency=args.latency, errorRate=args.error_rate, maxPageSize=args.max_page_size )
+
+	print( f'simulated controller at http://{args.host}:{server.server_address[1]}' )
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+
+if __name__ == '__main__':
+	main()
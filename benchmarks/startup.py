@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+##
+## Measure how long it takes to start Python and import the omada package.
+##
+## Each statement is run in a new interpreter 'repeat' times, and the median and
+## best wall times are reported next to a bare interpreter start. The modules
+## each statement pulls in are listed too, so a heavy import that sneaks back
+## into 'import omada' shows up right away.
+##
+##   python3 benchmarks/startup.py --repeat 20
+##
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+Root = os.path.dirname( os.path.dirname(os.path.abspath(__file__)) )
+
+Statements = (
+	('python', 'pass'),
+	('import omada', 'import omada'),
+	('from omada import Query', 'from omada import Query'),
+	('from omada import Omada', 'from omada import Omada'),
+	('from omada import AsyncOmada', 'from omada import AsyncOmada'),
+)
+
+Heavy = ('requests', 'urllib3', 'aiohttp', 'numpy', 'configparser', 'http.client', 'concurrent.futures')
+
+# Modules behind opt-in features, which 'from omada import Omada' should not load.
+Features = ('omada.cache', 'omada.retry', 'omada.stream', 'omada.records', 'omada.columns', 'omada.settings', 'omada.metrics', 'omada.query')
+
+def run(statement, repeat):
+
+	env = dict( os.environ, PYTHONPATH=Root + os.pathsep + os.environ.get('PYTHONPATH', '') )
+	report = f'{statement}\nimport sys, json\nprint(json.dumps([name for name in {Heavy + Features!r} if name in sys.modules]))'
+
+	times = []
+	for _ in range(repeat):
+		started = time.perf_counter()
+		subprocess.run( [sys.executable, '-c', statement], env=env, check=True )
+		times.append( time.perf_counter() - started )
+
+	output = subprocess.run( [sys.executable, '-c', report], env=env, check=True, capture_output=True, text=True ).stdout
+	return times, json.loads( output )
+
+def main():
+
+	parser = argparse.ArgumentParser( description='Measure the import time of the omada package.' )
+	parser.add_argument( '--repeat', type=int, default=10, help='interpreter starts per statement' )
+	args = parser.parse_args()
+
+	sys.stdout.write( 'STATEMENT'.ljust(32) + 'MEDIAN (ms)'.ljust(14) + 'BEST (ms)'.ljust(12) + 'LOADED\n' )
+
+	for name, statement in Statements:
+		times, loaded = run( statement, max(1, args.repeat) )
+		median = statistics.median( times ) * 1000
+		best = min( times ) * 1000
+		sys.stdout.write( name.ljust(32) + f'{median:.1f}'.ljust(14) + f'{best:.1f}'.ljust(12) + (', '.join(loaded) or '--') + '\n' )
+
+if __name__ == '__main__':
+	main()
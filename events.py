@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 
-import sys, time, re, collections
-from omada import Omada
+import sys, time, collections
+from omada import Omada, ContentRenderer
 
 FIELDDEF = collections.OrderedDict([
 	('content',('CONTENT',92)),
 	('time',   ('TIME',   24)),
 ])
 
+RENDERER = ContentRenderer()
+
 def format_date( date ):
 	return time.strftime('%b %e %Y %I:%M:%S %p', time.localtime(date // 1000))
 
@@ -30,14 +32,7 @@ def print_event( event ):
 	for key in event:
 
 		if key == 'content':
-			match = re.search( r'\[([a-z]+):([0-9A-F\-]+)\]', event[key] )
-			while match:
-				tag = str( match.group(1) )
-				mac = str( match.group(2) )
-				type = 'clientNames' if tag == 'client' else 'deviceNames'
-				name = '[' + event[type][mac] + ']'
-				event[key] = event[key].replace( match.group(0), name )
-				match = re.search( r'\[([a-z]+):([0-9A-F\-]+)\]', event[key] )
+			event[key] = RENDERER.render( event )
 
 		elif key == 'time':
 			event[key] = format_date( event[key] )
@@ -66,12 +61,8 @@ def main():
 
 	print_header()
 
-	count = 1
-	for event in omada.getSiteEvents():
+	for event in omada.getSiteEvents(limit=50):
 		print_event( event )
-		if count == 50:
-			break
-		count += 1
 
 	omada.logout()
 
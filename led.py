@@ -11,12 +11,12 @@ def main():
 	omada = Omada()
 	omada.login()
 
-	settings = omada.getSiteSettings()
+	settings = omada.siteSettings()
 
 	if len(sys.argv) > 1:
 		settings['led']['enable'] = (sys.argv[1] == 'on')
-		omada.setSiteSettings(settings)
-		settings = omada.getSiteSettings()
+		if settings.commit():
+			settings.refresh()
 
 	print( 'led: on' if settings['led']['enable'] else 'led: off' )
 
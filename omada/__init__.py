@@ -1 +1,47 @@
-from .omada import Omada
+from importlib import import_module
+
+##
+## The public names and the modules they are imported from.
+##
+## Modules are only imported when one of their names is first used, so importing
+## the package does not load requests, aiohttp, or NumPy until they are needed.
+##
+_exports = {
+	'Omada':            'omada',
+	'AsyncOmada':       'asyncomada',
+	'ResponseCache':    'cache',
+	'OmadaFleet':       'fleet',
+	'FleetResult':      'fleet',
+	'RetryPolicy':      'retry',
+	'CircuitOpenError': 'retry',
+	'EventSync':        'sync',
+	'Inventory':        'inventory',
+	'Record':           'records',
+	'Client':           'records',
+	'Device':           'records',
+	'Event':            'records',
+	'Alert':            'records',
+	'Columns':          'columns',
+	'ClientWatch':      'watch',
+	'PresenceEvent':    'watch',
+	'Rollout':          'rollout',
+	'RolloutResult':    'rollout',
+	'Metrics':          'metrics',
+	'ContentRenderer':  'render',
+	'Query':            'query',
+}
+
+__all__ = list( _exports )
+
+def __getattr__(name):
+
+	module = _exports.get( name )
+	if module is None:
+		raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+	value = getattr( import_module(f'.{module}', __name__), name )
+	globals()[name] = value
+	return value
+
+def __dir__():
+	return sorted( set(globals()) | set(__all__) )
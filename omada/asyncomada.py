@@ -0,0 +1,878 @@
+import os
+import re
+import json
+import asyncio
+import logging
+from collections import deque
+
+try:
+	import aiohttp
+except ImportError:
+	aiohttp = None
+
+from .omada import Omada, OmadaError, timestamp, enableDebugLogging
+from .cache import ResponseCache
+from .retry import RetryPolicy, CircuitBreaker
+from .query import Query
+
+#define Logger for class-wide usage
+logger = logging.getLogger(__name__)
+
+##
+## The asyncio Omada API class.
+##
+## This mirrors the Omada class, but every request is a coroutine and paged
+## endpoints return async iterators. All requests share one aiohttp session,
+## so a single event loop can drive many concurrent requests over a pooled
+## set of connections.
+##
+class AsyncOmada:
+
+	##
+	## Default API
+	##
+	ApiPath = Omada.ApiPath
+
+	##
+	## Shared enums
+	##
+	GroupType    = Omada.GroupType
+	LevelFilter  = Omada.LevelFilter
+	ModuleFilter = Omada.ModuleFilter
+
+	##
+	## Initialize a new asyncio Omada API instance.
+	##
+	## The 'poolsize' is the maximum number of simultaneous connections to the controller.
+	## Set 'prefetch' to the number of pages to fetch concurrently when iterating paged
+	## endpoints, 'pagesize' to the largest page size to try, and 'cache' to cache
+	## read-mostly GET results, as with Omada. Set 'retry' to True, or to a RetryPolicy
+	## instance, to retry failed requests and log in again when the session expires.
+	##
+	def __init__(self, config='omada.cfg', baseurl=None, site='Default', verify=True, warnings=True, verbose=False, poolsize=100, prefetch=0, pagesize=1000, section='omada', cache=None, retry=None):
+
+		if aiohttp is None:
+			raise ImportError('AsyncOmada requires aiohttp (pip install omada-api[async])')
+
+		self.config = None
+		self.section = section
+		self.cache = None
+		self.retry = None
+		self.breaker = None
+		self.credentials = (None, None)
+		self.loginLock = None
+		self.loginResult = None
+		self.currentPageSize = 10
+		self.maxPageSize = pagesize
+		self.pageSizes = {}
+		self.currentUser = {}
+		self.siteKeys = {}
+		self.siteNames = {}
+		self.siteKeysFolded = {}
+		self.apiPath = AsyncOmada.ApiPath
+		self.omadacId = ''
+		self.poolsize = poolsize
+		self.prefetch = prefetch
+		self.headers = {}
+		self.session = None
+
+		if baseurl is not None:
+			# use the provided configuration
+			self.baseurl  = baseurl
+			self.site     = site
+			self.verify   = verify
+			self.warnings = warnings
+			self.verbose  = verbose
+		elif os.path.isfile( config ):
+			# read from configuration file
+			from configparser import ConfigParser
+			self.config = ConfigParser()
+			try:
+				self.config.read( config )
+				self.baseurl  = self.config[self.section].get('baseurl')
+				self.site     = self.config[self.section].get('site', 'Default')
+				self.verify   = self.config[self.section].getboolean('verify', True)
+				self.warnings = self.config[self.section].getboolean('warnings', True)
+				self.verbose  = self.config[self.section].getboolean('verbose', False)
+				self.poolsize = self.config[self.section].getint('poolsize', poolsize)
+				self.prefetch = self.config[self.section].getint('prefetch', prefetch)
+				if cache is None and self.config[self.section].getboolean('cache', False):
+					cache = True
+				self.maxPageSize = self.config[self.section].getint('pagesize', pagesize)
+				if retry is None and self.config[self.section].getint('retries', 0) > 0:
+					retry = RetryPolicy( retries=self.config[self.section].getint('retries') )
+			except:
+				raise
+		else:
+			# could not find configuration
+			raise FileNotFoundError(config)
+
+		# set up the response cache
+		if cache is True:
+			self.cache = ResponseCache()
+		elif cache is not None and cache is not False:
+			self.cache = cache
+
+		# set up the retry policy and circuit breaker
+		if retry is True:
+			retry = RetryPolicy()
+		if retry:
+			self.retry = retry
+			self.breaker = CircuitBreaker( retry.breakerThreshold, retry.breakerTimeout )
+
+		# enable verbose output
+		if self.verbose:
+			enableDebugLogging()
+
+	##
+	## Support 'async with AsyncOmada(...) as omada:' to close the session on exit.
+	##
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *args):
+		await self.close()
+
+	##
+	## Return the shared client session, creating it on first use.
+	##
+	## The session must be created from inside a running event loop.
+	##
+	def __session(self):
+
+		if self.session is None:
+			connector = aiohttp.TCPConnector( limit=self.poolsize, ssl=None if self.verify else False )
+			# unsafe=True allows cookies for controllers addressed by IP
+			self.session = aiohttp.ClientSession( connector=connector, cookie_jar=aiohttp.CookieJar(unsafe=True) )
+
+		return self.session
+
+	##
+	## Close the client session and release all pooled connections.
+	##
+	async def close(self):
+		if self.session is not None:
+			await self.session.close()
+			self.session = None
+
+	##
+	## Build a URL for the provided path.
+	##
+	def __buildUrl(self, path):
+		return self.baseurl + self.omadacId + self.apiPath + path
+
+	##
+	## Return the endpoint template for a path, e.g. '/sites/{site}/clients'.
+	##
+	def __endpoint(self, path):
+		return re.sub( r'^/sites/[^/]+', '/sites/{site}', path )
+
+	##
+	## Return the scope of this controller's entries in a shared response cache.
+	##
+	def __cacheScope(self):
+		return (self.baseurl, self.omadacId)
+
+	##
+	## Index the sites in the privilege list by name, key, and case-folded name.
+	##
+	def __indexSites(self):
+
+		sites = self.currentUser['privilege']['sites'] if self.currentUser else []
+
+		self.siteKeys = {site['name']: site['key'] for site in sites}
+		self.siteNames = {site['key']: site['name'] for site in sites}
+		self.siteKeysFolded = {site['name'].casefold(): site['key'] for site in sites}
+
+	##
+	## Look up a site key given the name.
+	##
+	## The name can also be a site key or differ in case. Call refreshSites() to
+	## pick up sites added since login.
+	##
+	def __findKey(self, name=None):
+
+		# Use the stored site if not provided.
+		if name is None: name = self.site
+
+		if name in self.siteKeys: return self.siteKeys[name]
+		if name in self.siteNames: return name
+
+		key = self.siteKeysFolded.get( name.casefold() )
+		if key is None:
+			raise PermissionError(f'current user does not have privilege to site "{name}"')
+
+		return key
+
+	##
+	## Perform a request and return the decoded JSON response.
+	##
+	async def __fetch(self, method, url, **kwargs):
+
+		async with self.__session().request( method, url, headers=self.headers, **kwargs ) as response:
+			response.raise_for_status()
+			return await response.json( content_type=None )
+
+	##
+	## Send a request and return the decoded response, retrying as set by the retry policy.
+	##
+	## Set 'token' to add the timestamp and token parameters most calls expect. They
+	## are set again on every attempt, since logging in again changes the token.
+	##
+	async def __request(self, method, path, params, token=True, **kwargs):
+
+		retry = self.retry
+		attempt = 0
+
+		# Form uploads cannot be sent twice.
+		if isinstance(kwargs.get('data'), aiohttp.FormData):
+			retry = None
+
+		while True:
+
+			if retry is not None:
+				self.breaker.check( self.baseurl )
+
+			sentToken = self.loginResult['token']
+			if token:
+				params = dict( params, _=timestamp(), token=sentToken )
+
+			relogin = transient = False
+			try:
+				json = await self.__fetch( method, self.__buildUrl(path), params=params, **kwargs )
+				if retry is not None:
+					self.breaker.success()
+				if json['errorCode'] == 0:
+					return json
+				error = OmadaError(json)
+				relogin = retry is not None and error.errorCode in retry.reloginCodes
+			except aiohttp.ClientResponseError as ex:
+				error = ex
+				if retry is not None:
+					relogin = ex.status == 401
+					transient = ex.status in retry.statusCodes
+			except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as ex:
+				error = ex
+				transient = True
+
+			if retry is None:
+				raise error
+
+			if transient:
+				self.breaker.failure()
+
+			# Writes are only repeated when the controller rejected them unapplied.
+			if attempt >= retry.retries or not (relogin or (transient and method == 'GET')):
+				raise error
+
+			if relogin:
+				logger.info( f'session expired, logging in again ({error})' )
+				await self.__relogin( sentToken )
+			else:
+				logger.info( f'retrying {method} {path} ({error})' )
+				await asyncio.sleep( retry.delay(attempt) )
+
+			attempt += 1
+
+	##
+	## Log in again after the session has expired.
+	##
+	## If another task already replaced the expired token, its new session is used.
+	## The expired session stays in place until the new one is ready, so other tasks
+	## never see the client logged out.
+	##
+	async def __relogin(self, expiredToken):
+
+		if self.loginLock is None:
+			self.loginLock = asyncio.Lock()
+
+		async with self.loginLock:
+
+			if self.loginResult is not None and self.loginResult['token'] != expiredToken:
+				return
+
+			await self.__login( *self.credentials )
+
+	##
+	## Perform a GET request and return the result.
+	##
+	async def __get(self, path, params=None, data=None, json=None):
+
+		if self.loginResult is None:
+			raise ConnectionError('not logged in')
+
+		if params is None: params = {}
+
+		if not isinstance(params, dict):
+			raise TypeError('params must be a dictionary')
+
+		if self.cache is not None:
+			hit, result = self.cache.get( path, params, self.__cacheScope() )
+			if hit: return result
+
+		json = await self.__request( 'GET', path, params, token=False, data=data, json=json )
+		result = json['result'] if 'result' in json else None
+
+		if self.cache is not None:
+			self.cache.put( self.__endpoint(path), path, params, result, self.__cacheScope() )
+
+		return result
+
+	##
+	## Perform a POST request and return the result.
+	##
+	async def __post(self, path, params=None, data=None, json=None):
+
+		if self.loginResult is None:
+			raise ConnectionError('not logged in')
+
+		if params is None: params = {}
+
+		if not isinstance(params, dict):
+			raise TypeError('params must be a dictionary')
+
+		try:
+			json = await self.__request( 'POST', path, params, data=data, json=json )
+		finally:
+			# Writes make any cached reads of this path stale.
+			if self.cache is not None:
+				self.cache.invalidate( path, self.__cacheScope() )
+
+		return json['result'] if 'result' in json else None
+
+	##
+	## Perform a PATCH request and return the result.
+	##
+	async def __patch(self, path, params=None, data=None, json=None):
+
+		if self.loginResult is None:
+			raise ConnectionError('not logged in')
+
+		if params is None: params = {}
+
+		if not isinstance(params, dict):
+			raise TypeError('params must be a dictionary')
+
+		try:
+			json = await self.__request( 'PATCH', path, params, data=data, json=json )
+		finally:
+			# Writes make any cached reads of this path stale.
+			if self.cache is not None:
+				self.cache.invalidate( path, self.__cacheScope() )
+
+		return json['result'] if 'result' in json else None
+
+	##
+	## Return True if a result contains data.
+	##
+	def __hasData(self, result):
+		return (result is not None) and ('data' in result) and (len(result['data']) > 0)
+
+	##
+	## Perform a paged GET request and return the result.
+	##
+	## The page size actually used is stored in 'params'.
+	##
+	async def __getPaged(self, path, params=None, data=None, json=None, limit=None):
+
+		if self.loginResult is None:
+			raise ConnectionError('not logged in')
+
+		if params is None: params = {}
+
+		if not isinstance(params, dict):
+			raise TypeError('params must be a dictionary')
+
+		if 'currentPage' not in params:
+			params['currentPage'] = 1
+
+		if 'currentPageSize' in params:
+			return await self.__getPage( path, params, data, json )
+
+		# Start with the largest page size known to work for this endpoint.
+		endpoint = self.__endpoint( path )
+		accepted = self.pageSizes.get( endpoint, self.maxPageSize )
+		pageSize = accepted if limit is None else max( 1, min(accepted, limit) )
+		rejected = None
+
+		while True:
+			params['currentPageSize'] = pageSize
+			try:
+				result = await self.__getPage( path, params, data, json )
+				break
+			except (OmadaError, aiohttp.ClientResponseError) as error:
+				# The controller may reject large pages, so try a smaller one.
+				if not self.__rejectsPageSize( error ) or pageSize <= self.currentPageSize: raise
+				rejected = pageSize
+				pageSize = accepted = max( pageSize // 2, self.currentPageSize )
+
+		# Halving overshoots, e.g. from 1000 to 62 when the controller allows 100,
+		# so search for the largest size between the accepted and rejected ones.
+		if rejected is not None and params['currentPage'] == 1:
+			while rejected - accepted > 1:
+				size = (accepted + rejected) // 2
+				try:
+					result = await self.__getPage( path, dict(params, currentPageSize=size), data, json )
+					accepted = size
+				except (OmadaError, aiohttp.ClientResponseError) as error:
+					if not self.__rejectsPageSize( error ): raise
+					rejected = size
+			# 'result' came from the accepted size, and the next pages must use it too.
+			pageSize = params['currentPageSize'] = accepted
+
+		# The controller may also cap the page size without complaint.
+		if int( result['currentSize'] ) < pageSize:
+			accepted = int( result['currentSize'] )
+
+		self.pageSizes[endpoint] = accepted
+		return result
+
+	##
+	## Return True if an error means the controller rejected the page size.
+	##
+	def __rejectsPageSize(self, error):
+		if isinstance(error, OmadaError):
+			return error.errorCode == -1001
+		if isinstance(error, aiohttp.ClientResponseError):
+			return error.status == 400
+		return False
+
+	##
+	## Perform a GET request for a single page and return the result.
+	##
+	async def __getPage(self, path, params, data=None, json=None):
+		json = await self.__request( 'GET', path, params, data=data, json=json )
+		return json['result']
+
+	##
+	## Return True if there are more pages after the given result.
+	##
+	def __hasNextPage(self, result):
+
+		totalRows   = int( result['totalRows'] )
+		currentPage = int( result['currentPage'] )
+		currentSize = int( result['currentSize'] )
+		dataLength  = len( result['data'] )
+
+		return dataLength + (currentPage-1)*currentSize < totalRows
+
+	##
+	## Perform a paged GET request and asynchronously yield the results.
+	##
+	## Iteration stops after 'limit' items if provided.
+	##
+	async def __geterator(self, path, params=None, data=None, json=None, limit=None):
+
+		params = dict( params or {} )
+		result = await self.__getPaged( path, params, data, json, limit )
+
+		if self.prefetch > 1 and self.__hasData( result ):
+			items = self.__prefetchPages( result, path, params, data, json, limit )
+		else:
+			items = self.__iteratePages( result, path, params, data, json )
+
+		count = 0
+		try:
+			async for item in items:
+				if limit is not None and count >= limit: break
+				yield item
+				count += 1
+		finally:
+			await items.aclose()
+
+	##
+	## Asynchronously yield the results of a paged request, one page at a time.
+	##
+	async def __iteratePages(self, result, path, params, data=None, json=None):
+
+		while self.__hasData( result ):
+			for item in result['data']: yield item
+			if not self.__hasNextPage( result ): break
+			params['currentPage'] = int( result['currentPage'] ) + 1
+			result = await self.__getPaged( path, params, data, json )
+
+	##
+	## Asynchronously yield the results of a paged request, fetching the remaining pages concurrently.
+	##
+	async def __prefetchPages(self, result, path, params, data=None, json=None, limit=None):
+
+		totalRows   = int( result['totalRows'] )
+		if limit is not None: totalRows = min( totalRows, limit )
+		currentPage = int( result['currentPage'] )
+		currentSize = int( result['currentSize'] )
+		lastPage    = (totalRows + currentSize - 1) // currentSize
+
+		pages = iter( range(currentPage+1, lastPage+1) )
+		pending = deque()
+
+		def submit():
+			page = next( pages, None )
+			if page is not None:
+				pending.append( asyncio.ensure_future(self.__getPaged(path, dict(params, currentPage=page), data, json)) )
+
+		try:
+			for _ in range(self.prefetch): submit()
+			for item in result['data']: yield item
+			while pending:
+				result = await pending.popleft()
+				submit()
+				if not self.__hasData( result ): break
+				for item in result['data']: yield item
+		finally:
+			# don't wait on pages nobody will read
+			for task in pending: task.cancel()
+
+	##
+	## Call a site method for many sites concurrently and asynchronously yield the merged results.
+	##
+	## Each record is tagged with the name of its site in 'site'. Records are yielded
+	## as soon as any site produces them, with at most 'concurrency' sites queried at
+	## once. Sites default to every site from getSites().
+	##
+	async def __fanOut(self, method, sites=None, concurrency=8, **kwargs):
+
+		if sites is None:
+			sites = [site['name'] async for site in self.getSites()]
+
+		results = asyncio.Queue()
+		semaphore = asyncio.Semaphore( max(1, concurrency) )
+		done = object()
+
+		async def worker(site):
+			try:
+				async with semaphore:
+					records = method( site=site, **kwargs )
+					if asyncio.iscoroutine( records ):
+						records = iter( await records )
+					if hasattr( records, '__aiter__' ):
+						async for record in records:
+							record['site'] = site
+							await results.put( record )
+					else:
+						for record in records:
+							record['site'] = site
+							await results.put( record )
+				await results.put( done )
+			except Exception as ex:
+				await results.put( ex )
+
+		tasks = [asyncio.ensure_future( worker(site) ) for site in sites]
+		try:
+			remaining = len( tasks )
+			while remaining:
+				record = await results.get()
+				if record is done:
+					remaining -= 1
+				elif isinstance(record, Exception):
+					raise record
+				else:
+					yield record
+		finally:
+			# stop the workers if the caller is done
+			for task in tasks: task.cancel()
+
+	##
+	## Get OmadacId to prefix request. (Required for version 5.)
+	##
+	async def getApiInfo(self):
+
+		# This uses a different path, so perform request manually.
+		json = await self.__fetch( 'GET', self.baseurl + '/api/info' )
+		if json['errorCode'] == 0:
+			return json['result'] if 'result' in json else None
+
+		raise OmadaError(json)
+
+	##
+	## Log in with the provided credentials and return the result.
+	##
+	async def login(self, username=None, password=None):
+
+		# Only try to log in if we're not already logged in.
+		if self.loginResult is None:
+			await self.__login( username, password )
+
+		return self.loginResult
+
+	##
+	## Perform the login handshake and replace the current session, if any.
+	##
+	async def __login(self, username=None, password=None):
+
+		# Fetch the API info from the controller. (Does not require login.)
+		apiInfo = await self.getApiInfo()
+
+		# Store the omadacId value. (Required by version 5.)
+		if 'omadacId' in apiInfo:
+			self.omadacId = '/' + apiInfo['omadacId']
+
+		# Get the username and password if not specified.
+		if username is None and password is None:
+			if self.config is None:
+				raise TypeError('username and password cannot be None')
+			try:
+				username = self.config[self.section].get('username')
+				password = self.config[self.section].get('password')
+			except:
+				raise
+
+		# Nothing cached from another session can be trusted.
+		if self.cache is not None:
+			self.cache.invalidate( scope=self.__cacheScope() )
+
+		# Perform the login request manually.
+		json = await self.__fetch( 'POST', self.__buildUrl('/login'), json={'username':username,'password':password} )
+		if json['errorCode'] != 0:
+			raise OmadaError(json)
+
+		# Store CSRF token header.
+		self.headers['Csrf-Token'] = json['result']['token']
+
+		# Store the login result and the credentials to log in again with.
+		self.loginResult = json['result']
+		self.credentials = (username, password)
+
+		# Get the current user info and index the user's sites.
+		self.currentUser = await self.getCurrentUser()
+		self.__indexSites()
+
+	##
+	## Log out of the current session. Return value is always None.
+	##
+	async def logout(self):
+
+		result = None
+
+		# Only try to log out if we're already logged in.
+		if self.loginResult is not None:
+			# Send the logout request.
+			result = await self.__post( '/logout' )
+			# Clear the stored result.
+			self.loginResult = None
+			if self.cache is not None:
+				self.cache.invalidate( scope=self.__cacheScope() )
+			self.headers.pop( 'Csrf-Token', None )
+
+		return result
+
+	##
+	## Returns the current login status.
+	##
+	async def getLoginStatus(self):
+		return await self.__get( '/loginStatus' )
+
+	##
+	## Returns the current user information.
+	##
+	async def getCurrentUser(self):
+		return await self.__get( '/users/current' )
+
+	##
+	## Reload the current user and rebuild the site index.
+	##
+	async def refreshSites(self):
+
+		if self.cache is not None:
+			self.cache.invalidate( '/users/current', self.__cacheScope() )
+
+		self.currentUser = await self.getCurrentUser()
+		self.__indexSites()
+
+	##
+	## Returns the name of the site with the given key.
+	##
+	def getSiteName(self, key):
+		return self.siteNames[key]
+
+	##
+	## Returns the list of groups for the given site.
+	##
+	async def getSiteGroups(self, site=None, type=None):
+		return await self.__get( f'/sites/{self.__findKey(site)}/setting/profiles/groups' + (f'/{type}' if type else '') )
+
+	##
+	## Returns the list of portal candidates for the given site.
+	##
+	async def getPortalCandidates(self, site=None):
+		return await self.__get( f'/sites/{self.__findKey(site)}/setting/portal/candidates' )
+
+	##
+	## Returns the list of RADIUS profiles for the given site.
+	##
+	async def getRadiusProfiles(self, site=None):
+		return await self.__get( f'/sites/{self.__findKey(site)}/setting/radiusProfiles' )
+
+	##
+	## Returns the list of scenarios.
+	##
+	async def getScenarios(self):
+		return await self.__get( '/scenarios' )
+
+	##
+	## Returns an async iterator of all sites.
+	##
+	def getSites(self, limit=None):
+		return self.__geterator( f'/sites', limit=limit )
+
+	##
+	## Returns the list of devices for given site.
+	##
+	async def getSiteDevices(self, site=None):
+		return await self.__get( f'/sites/{self.__findKey(site)}/devices' )
+
+	##
+	## Returns an async iterator of devices for all sites, tagged with 'site'.
+	##
+	def getAllSiteDevices(self, sites=None, concurrency=8):
+		return self.__fanOut( self.getSiteDevices, sites, concurrency )
+
+	##
+	## Returns an async iterator of active clients for given site.
+	##
+	## A 'query' adds filters and sorting, and may replace the 'active' filter.
+	##
+	def getSiteClients(self, site=None, limit=None, query=None):
+		params = {'filters.active': 'true'}
+		params.update( Query(query).params )
+		return self.__geterator( f'/sites/{self.__findKey(site)}/clients', params=params, limit=limit )
+
+	##
+	## Returns an async iterator of active clients for all sites, tagged with 'site'.
+	##
+	def getAllSiteClients(self, sites=None, concurrency=8, limit=None):
+		return self.__fanOut( self.getSiteClients, sites, concurrency, limit=limit )
+
+	##
+	## Returns an async iterator of alerts for given site.
+	##
+	## A 'query' adds filters and sorting.
+	##
+	def getSiteAlerts(self, site=None, archived=False, level=None, module=None, searchKey=None, limit=None, query=None):
+
+		params = Query( query ).filter( archived=archived, level=level, module=module ).search( searchKey ).toParams()
+
+		return self.__geterator( f'/sites/{self.__findKey(site)}/alerts', params=params, limit=limit )
+
+	##
+	## Returns an async iterator of alerts for all sites, tagged with 'site'.
+	##
+	def getAllSiteAlerts(self, sites=None, concurrency=8, **kwargs):
+		return self.__fanOut( self.getSiteAlerts, sites, concurrency, **kwargs )
+
+	##
+	## Returns an async iterator of events for given site.
+	##
+	## A 'query' adds filters and sorting.
+	##
+	def getSiteEvents(self, site=None, level=None, module=None, searchKey=None, limit=None, query=None):
+
+		params = Query( query ).filter( level=level, module=module ).search( searchKey ).toParams()
+
+		return self.__geterator( f'/sites/{self.__findKey(site)}/events', params=params, limit=limit )
+
+	##
+	## Returns an async iterator of events for all sites, tagged with 'site'.
+	##
+	def getAllSiteEvents(self, sites=None, concurrency=8, **kwargs):
+		return self.__fanOut( self.getSiteEvents, sites, concurrency, **kwargs )
+
+	##
+	## Returns the notification settings for given site.
+	##
+	async def getSiteNotifications(self, site=None):
+		return await self.__get( f'/sites/{self.__findKey(site)}/notification' )
+
+	##
+	## Returns the list of settings for the given site.
+	##
+	async def getSiteSettings(self, site=None):
+		return await self.__get( f'/sites/{self.__findKey(site)}/setting' )
+
+	##
+	## Push back the settings for the site.
+	##
+	async def setSiteSettings(self, settings, site=None):
+		return await self.__patch( f'/sites/{self.__findKey(site)}/setting', json=settings )
+
+	##
+	## Returns the list of settings for the controller.
+	##
+	async def getControllerSettings(self):
+		return await self.__get( f'/controller/setting' )
+
+	##
+	## Push back the settings for the controller.
+	##
+	async def setControllerSettings(self, settings):
+		return await self.__patch( f'/controller/setting', json=settings )
+
+	async def setControllerJksCertificate(self, jks_path, password):
+		return await self.__setControllerCertificate(cert_type="JKS",
+							     cert_path=jks_path,
+							     key_password=password)
+
+	async def setControllerPfxCertificate(self, pfx_path, password):
+		return await self.__setControllerCertificate(cert_type="PFX",
+							     cert_path=pfx_path,
+							     key_password=password)
+
+	async def setControllerPemCertificate(self, cert_path, key_path):
+		return await self.__setControllerCertificate(cert_type="PEM",
+							     cert_path=cert_path,
+							     key_path=key_path)
+
+	async def __uploadFile(self, src_path, dest_path, data, content_type="application/octet-stream"):
+		src_name = os.path.basename(src_path)
+		with open(src_path, 'rb') as src_file:
+			form = aiohttp.FormData()
+			form.add_field('file', src_file.read(), filename=src_name, content_type=content_type)
+			form.add_field('data', json.dumps(data))
+			return await self.__post(f'/files/{dest_path}', data=form)
+
+	##
+	## Set new certificate for the controller
+	##
+	async def __setControllerCertificate(self, cert_type, cert_path, key_path=None, key_password=None):
+		await self.__uploadFile(cert_path,
+					'controller/certificate',
+					{"cerName": os.path.basename(cert_path)})
+		if key_path:
+			await self.__uploadFile(key_path,
+						'controller/key',
+						{"keyName": os.path.basename(key_path)})
+
+		# re-upload the certificate settings to force cert file validation
+		cert_settings = (await self.getControllerSettings())['certificate']
+		cert_settings['cerType'] = cert_type
+		cert_settings['enable'] = True
+		if key_password:
+			cert_settings['keyPassword'] = key_password
+		else:
+			cert_settings.pop('keyPassword', None)
+		if not key_path:
+			# Delete PEM key file details if they exist
+			cert_settings.pop('keyId', None)
+			cert_settings.pop('keyName', None)
+		# only the certificate section needs to be sent, even if unchanged
+		return await self.setControllerSettings( {'certificate': cert_settings} )
+
+	async def reboot(self):
+		return await self.__post('/cmd/reboot')
+
+	##
+	## Returns the list of timerange profiles for the given site.
+	##
+	async def getTimeRanges(self, site=None):
+		return await self.__get( f'/sites/{self.__findKey(site)}/setting/profiles/timeranges' )
+
+	##
+	## Returns the list of wireless network groups.
+	##
+	async def getWirelessGroups(self, site=None):
+		return await self.__get( f'/sites/{self.__findKey(site)}/setting/wlans' )
+
+	##
+	## Returns the list of wireless networks for the given group.
+	##
+	async def getWirelessNetworks(self, group, site=None):
+		return await self.__get( f'/sites/{self.__findKey(site)}/setting/wlans/{group}/ssids' )
@@ -0,0 +1,102 @@
+import copy
+import time
+from collections import OrderedDict
+from threading import Lock
+
+##
+## A size-bounded LRU cache of GET results with a time-to-live per endpoint.
+##
+## Only endpoints listed in 'ttls' are cached. Endpoints are path templates with
+## the site key replaced by '{site}', e.g. '/sites/{site}/setting'. Results are
+## copied in and out of the cache so callers can modify them freely.
+##
+## One cache can be shared by clients of several controllers. Each client passes
+## its own 'scope', the controller's base URL and id, so the same path on two
+## controllers is kept apart, and a client only invalidates its own entries.
+##
+class ResponseCache:
+
+	##
+	## Default time-to-live in seconds for read-mostly endpoints.
+	##
+	DefaultTTLs = {
+		'/users/current':                        300,
+		'/sites/{site}/setting':                 60,
+		'/sites/{site}/setting/profiles/groups': 300,
+		'/sites/{site}/setting/radiusProfiles':  300,
+		'/sites/{site}/setting/profiles/timeranges': 300,
+		'/sites/{site}/setting/wlans':           300,
+		'/controller/setting':                   60,
+	}
+
+	def __init__(self, ttls=None, maxsize=256):
+		self.ttls = dict( ResponseCache.DefaultTTLs if ttls is None else ttls )
+		self.maxsize = maxsize
+		self.entries = OrderedDict()
+		self.lock = Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def __len__(self):
+		return len(self.entries)
+
+	##
+	## Build a cache key from the scope, request path, and parameters.
+	##
+	def __key(self, scope, path, params):
+		return (scope, path, tuple(sorted( (params or {}).items() )))
+
+	##
+	## Return (True, result) for a live entry or (False, None) otherwise.
+	##
+	def get(self, path, params=None, scope=None):
+
+		key = self.__key( scope, path, params )
+
+		with self.lock:
+			entry = self.entries.get( key )
+			if entry is not None:
+				expires, result = entry
+				if expires > time.monotonic():
+					self.entries.move_to_end( key )
+					self.hits += 1
+					return True, copy.deepcopy( result )
+				del self.entries[key]
+			self.misses += 1
+
+		return False, None
+
+	##
+	## Store a result if its endpoint is cacheable, evicting the least recently used entries.
+	##
+	def put(self, endpoint, path, params, result, scope=None):
+
+		ttl = self.ttls.get( endpoint )
+		if not ttl: return
+
+		key = self.__key( scope, path, params )
+
+		with self.lock:
+			self.entries[key] = (time.monotonic() + ttl, copy.deepcopy( result ))
+			self.entries.move_to_end( key )
+			while len(self.entries) > self.maxsize:
+				self.entries.popitem( last=False )
+
+	##
+	## Remove cached entries for the given path and everything below it, or all entries.
+	##
+	## With a 'scope', only that scope's entries are removed.
+	##
+	def invalidate(self, path=None, scope=None):
+
+		with self.lock:
+			if path is None and scope is None:
+				self.entries.clear()
+				return
+
+			def matches(key):
+				if scope is not None and key[0] != scope: return False
+				return path is None or key[1] == path or key[1].startswith(path + '/')
+
+			for key in [key for key in self.entries if matches(key)]:
+				del self.entries[key]
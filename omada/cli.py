@@ -0,0 +1,300 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import heapq
+import argparse
+from itertools import islice
+
+from .render import ContentRenderer
+
+##
+## Format a number of bytes, e.g. 1.5 MB.
+##
+def formatSize(size, suffix='B'):
+	for unit in ['K','M','G','T','P','E','Z']:
+		size /= 1000.0
+		if abs( size ) < 1000.0:
+			return f'{size:.1f} {unit}{suffix}'
+	return f'{size:.1f} Y{suffix}'
+
+##
+## Format a number of seconds, e.g. 2d 3:04:05.
+##
+def formatUptime(seconds):
+	d = seconds // (3600 * 24)
+	h = seconds // 3600 % 24
+	m = seconds % 3600 // 60
+	s = seconds % 3600 % 60
+	if d > 0: return f'{d}d {h}:{m:02d}:{s:02d}'
+	if h > 0: return f'{h}:{m:02d}:{s:02d}'
+	if m > 0: return f'{m:02d}:{s:02d}'
+	if s > 0: return f'{s:02d}'
+	return '--'
+
+##
+## Format a timestamp in milliseconds as local time.
+##
+def formatDate(date):
+	return time.strftime( '%b %e %Y %I:%M:%S %p', time.localtime(date // 1000) )
+
+##
+## The listings: default fields as (field, header, width), and how to format
+## fields for the table output.
+##
+Listings = {
+	'clients': (
+		('name',        'NAME',         20),
+		('mac',         'MAC ADDRESS',  20),
+		('ip',          'IP ADDRESS',   16),
+		('networkName', 'SSID/NETWORK', 16),
+		('apName',      'AP/SWITCH',    16),
+		('activity',    'ACTIVITY',     12),
+		('trafficDown', 'DOWNLOAD',     10),
+		('trafficUp',   'UPLOAD',       10),
+		('uptime',      'UPTIME',       16),
+	),
+	'devices': (
+		('name',       'NAME',       16),
+		('mac',        'MAC ADDRESS', 20),
+		('ip',         'IP ADDRESS', 16),
+		('status',     'STATUS',     8),
+		('showModel',  'MODEL',      24),
+		('version',    'VERSION',    12),
+		('uptimeLong', 'UPTIME',     16),
+	),
+	'events': (
+		('time',    'TIME',    24),
+		('level',   'LEVEL',   12),
+		('content', 'CONTENT', 92),
+	),
+	'alerts': (
+		('time',    'TIME',    24),
+		('level',   'LEVEL',   12),
+		('content', 'CONTENT', 72),
+	),
+}
+
+Formatters = {
+	'activity':    lambda value: formatSize( value, 'B/s' ),
+	'trafficDown': formatSize,
+	'trafficUp':   formatSize,
+	'uptime':      formatUptime,
+	'uptimeLong':  formatUptime,
+	'time':        formatDate,
+}
+
+##
+## Write records as JSON, one per line.
+##
+class JsonlWriter:
+
+	def __init__(self, out, fields):
+		self.out = out
+		self.fields = fields
+
+	def write(self, record):
+		if self.fields is not None:
+			record = {field: record.get(field) for field in self.fields}
+		self.out.write( json.dumps(record, separators=(',',':')) )
+		self.out.write( '\n' )
+
+##
+## Write records as CSV with a header row. Nested values are written as JSON.
+##
+class CsvWriter:
+
+	def __init__(self, out, fields):
+		self.fields = fields
+		self.writer = csv.writer( out )
+		self.writer.writerow( fields )
+
+	def write(self, record):
+		row = []
+		for field in self.fields:
+			value = record.get( field )
+			if value is None:
+				value = ''
+			elif isinstance(value, (dict, list)):
+				value = json.dumps( value, separators=(',',':') )
+			row.append( value )
+		self.writer.writerow( row )
+
+##
+## Write records as a fixed-width table like the example scripts.
+##
+class TableWriter:
+
+	def __init__(self, out, columns, bold=False):
+		self.out = out
+		self.columns = columns
+		header = ''.join( text.ljust(width) for _, text, width in columns )
+		out.write( f'\33[1m{header}\33[0m\n' if bold else f'{header}\n' )
+
+	def write(self, record):
+
+		cells = []
+		for field, _, width in self.columns:
+
+			value = record.get( field )
+			if value is None:
+				text = '--'
+			elif field in Formatters and isinstance(value, (int, float)):
+				text = Formatters[field]( value )
+			else:
+				text = str( value ).strip()
+
+			if len(text) >= width:
+				text = text[0:width-4] + '... '
+			cells.append( text.ljust(width) )
+
+		self.out.write( ''.join(cells) )
+		self.out.write( '\n' )
+
+##
+## Yield at most 'limit' records for each site.
+##
+## Devices are not paged, so every site's devices are fetched either way; this
+## only makes --limit mean the same for devices as for the other listings.
+##
+def limitPerSite(records, limit):
+	counts = {}
+	for record in records:
+		count = counts.get( record.get('site'), 0 )
+		if count < limit:
+			counts[record.get('site')] = count + 1
+			yield record
+
+##
+## Return the records for a listing.
+##
+def fetch(omada, args):
+
+	sites = args.site or None
+	fanOut = args.all_sites or (sites is not None and len(sites) > 1)
+	site = sites[0] if sites else None
+
+	if args.command == 'clients':
+		if fanOut:
+			return omada.getAllSiteClients( sites, args.concurrency, limit=args.limit )
+		return omada.getSiteClients( site, limit=args.limit )
+
+	if args.command == 'devices':
+		if fanOut:
+			records = omada.getAllSiteDevices( sites, args.concurrency )
+			return records if args.limit is None else limitPerSite( records, args.limit )
+		records = omada.getSiteDevices( site ) or []
+		return records if args.limit is None else islice( records, args.limit )
+
+	if args.command == 'events':
+		if fanOut:
+			return omada.getAllSiteEvents( sites, args.concurrency, limit=args.limit )
+		return omada.getSiteEvents( site, limit=args.limit )
+
+	if args.command == 'alerts':
+		if fanOut:
+			return omada.getAllSiteAlerts( sites, args.concurrency, archived=args.archived, limit=args.limit )
+		return omada.getSiteAlerts( site, archived=args.archived, limit=args.limit )
+
+##
+## Sort records by a field, keeping only the first 'top' if given.
+##
+## With 'top', only that many records are ever held, in a bounded heap. Missing
+## values sort last.
+##
+def order(records, field, descending=False, top=None):
+
+	if descending:
+		key = lambda record: (record.get(field) is not None, record.get(field))
+		return heapq.nlargest( top, records, key ) if top is not None else sorted( records, key=key, reverse=True )
+
+	key = lambda record: (record.get(field) is None, record.get(field))
+	return heapq.nsmallest( top, records, key ) if top is not None else sorted( records, key=key )
+
+def parseArgs(argv=None):
+
+	common = argparse.ArgumentParser( add_help=False )
+	common.add_argument( '-c', '--config', default=os.environ.get('OMADA_CONFIG', 'omada.cfg'), help='configuration file (default: omada.cfg)' )
+	common.add_argument( '--section', default='omada', help='configuration section (default: omada)' )
+	common.add_argument( '-s', '--site', action='append', help='site name (repeat for more than one site)' )
+	common.add_argument( '-a', '--all-sites', action='store_true', help='list every site' )
+	common.add_argument( '-f', '--format', choices=('table', 'jsonl', 'csv'), default='table', help='output format (default: table)' )
+	common.add_argument( '--fields', type=lambda text: [field.strip() for field in text.split(',') if field.strip()], help='comma-separated fields to output' )
+	common.add_argument( '--sort', metavar='FIELD', help='sort by a field' )
+	common.add_argument( '--desc', action='store_true', help='sort in descending order' )
+	common.add_argument( '--top', metavar='N', type=int, help='output only the first N records, after sorting' )
+	common.add_argument( '--limit', metavar='N', type=int, help='fetch at most N records per site' )
+	common.add_argument( '--concurrency', type=int, default=8, help='sites to query at once (default: 8)' )
+
+	parser = argparse.ArgumentParser( prog='omada', description='List clients, devices, events, or alerts from an Omada controller.' )
+	commands = parser.add_subparsers( dest='command', metavar='command' )
+	commands.required = True
+	commands.add_parser( 'clients', parents=[common], help='list clients' )
+	commands.add_parser( 'devices', parents=[common], help='list devices' )
+	commands.add_parser( 'events', parents=[common], help='list events' )
+	alerts = commands.add_parser( 'alerts', parents=[common], help='list alerts' )
+	alerts.add_argument( '--archived', action='store_true', help='list archived alerts' )
+
+	return parser.parse_args( argv )
+
+def main(argv=None):
+
+	args = parseArgs( argv )
+
+	# Imported here so --help does not wait for requests to load.
+	from .omada import Omada
+
+	omada = Omada( args.config, section=args.section )
+	omada.login()
+
+	# Buffer output in large blocks instead of writing each cell.
+	out = io.TextIOWrapper( io.BufferedWriter(io.FileIO(sys.stdout.fileno(), 'w', closefd=False), 1 << 16), encoding='utf-8', newline='' )
+
+	try:
+		records = fetch( omada, args )
+
+		if args.command in ('events', 'alerts'):
+			records = ContentRenderer().renderAll( records )
+
+		if args.sort:
+			records = order( records, args.sort, args.desc, args.top )
+		elif args.top is not None:
+			records = islice( records, args.top )
+
+		fanOut = args.all_sites or (args.site is not None and len(args.site) > 1)
+		columns = Listings[args.command]
+		if args.fields:
+			widths = {field: width for field, _, width in columns}
+			columns = tuple( (field, field.upper(), widths.get(field, 16)) for field in args.fields )
+		elif fanOut:
+			columns = (('site', 'SITE', 16),) + columns
+
+		if args.format == 'jsonl':
+			writer = JsonlWriter( out, args.fields )
+		elif args.format == 'csv':
+			writer = CsvWriter( out, [field for field, _, _ in columns] )
+		else:
+			writer = TableWriter( out, columns, sys.stdout.isatty() )
+
+		for record in records:
+			writer.write( record )
+
+		out.flush()
+
+	except BrokenPipeError:
+		# The reader went away, e.g. 'omada clients | head'.
+		os.dup2( os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno() )
+		return 1
+
+	except KeyboardInterrupt:
+		return 130
+
+	finally:
+		omada.logout()
+
+	return 0
+
+if __name__ == '__main__':
+	sys.exit( main() )
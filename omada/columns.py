@@ -0,0 +1,134 @@
+from array import array
+
+# NumPy is imported on first use, since it is slow to import.
+numpy = False
+
+##
+## Return the numpy module, or None if it is not installed.
+##
+def loadNumpy():
+
+	global numpy
+	if numpy is False:
+		try:
+			import numpy
+		except ImportError:
+			numpy = None
+
+	return numpy
+
+##
+## Column arrays built from a stream of records, for fast aggregation.
+##
+## Numeric columns are float64 arrays, NumPy arrays if NumPy is installed and
+## 'array.array' otherwise. String columns are dictionary-encoded: an integer code
+## array plus the list of distinct 'labels' the codes refer to. Missing numbers
+## are stored as 0 and missing strings as None.
+##
+##   columns = omada.getSiteClientColumns()
+##   columns.sumBy('apName', 'trafficDown')   # {'Office AP': 123456, ...}
+##
+class Columns:
+
+	##
+	## Default columns for clients and devices.
+	##
+	ClientNumeric = ('trafficDown', 'trafficUp', 'activity', 'uptime')
+	ClientStrings = ('site', 'mac', 'ip', 'ssid', 'apName', 'networkName')
+	DeviceNumeric = ('uptimeLong', 'status')
+	DeviceStrings = ('site', 'mac', 'ip', 'name', 'type', 'showModel', 'version')
+
+	def __init__(self, numeric, codes, labels):
+		self.numeric = numeric
+		self.codes = codes
+		self.labels = labels
+
+	##
+	## Build columns from an iterable of records in a single pass.
+	##
+	@classmethod
+	def fromRecords(cls, records, numeric=(), strings=()):
+
+		values = {name: array('d') for name in numeric}
+		codes = {name: array('l') for name in strings}
+		lookups = {name: {} for name in strings}
+		labels = {name: [] for name in strings}
+
+		for record in records:
+
+			for name in numeric:
+				value = record.get( name )
+				values[name].append( value if value is not None else 0 )
+
+			for name in strings:
+				value = record.get( name )
+				lookup = lookups[name]
+				code = lookup.get( value )
+				if code is None:
+					code = lookup[value] = len( labels[name] )
+					labels[name].append( value )
+				codes[name].append( code )
+
+		numpy = loadNumpy()
+		if numpy is not None:
+			values = {name: numpy.frombuffer(column, dtype=numpy.float64) for name, column in values.items()}
+			codes = {name: numpy.frombuffer(column, dtype=numpy.dtype('l')) for name, column in codes.items()}
+
+		return cls( values, codes, labels )
+
+	def __len__(self):
+		for column in self.numeric.values(): return len(column)
+		for column in self.codes.values(): return len(column)
+		return 0
+
+	##
+	## Return a numeric column, or the codes of a string column.
+	##
+	def __getitem__(self, name):
+		if name in self.numeric:
+			return self.numeric[name]
+		return self.codes[name]
+
+	##
+	## Return the values of a string column as a list.
+	##
+	def decode(self, name):
+		labels = self.labels[name]
+		return [labels[code] for code in self.codes[name]]
+
+	##
+	## Return the sum of a numeric column for each distinct value of a string column.
+	##
+	def sumBy(self, key, value):
+
+		codes = self.codes[key]
+		labels = self.labels[key]
+		column = self.numeric[value]
+
+		numpy = loadNumpy()
+		if numpy is not None:
+			sums = numpy.bincount( codes, weights=column, minlength=len(labels) )
+			return dict( zip(labels, sums.tolist()) )
+
+		sums = [0.0] * len(labels)
+		for code, number in zip( codes, column ):
+			sums[code] += number
+		return dict( zip(labels, sums) )
+
+	##
+	## Return the number of rows for each distinct value of a string column.
+	##
+	def countBy(self, key):
+
+		codes = self.codes[key]
+		labels = self.labels[key]
+
+		numpy = loadNumpy()
+		if numpy is not None:
+			counts = numpy.bincount( codes, minlength=len(labels) )
+			return dict( zip(labels, counts.tolist()) )
+
+		counts = [0] * len(labels)
+		for code in codes:
+			counts[code] += 1
+		return dict( zip(labels, counts) )
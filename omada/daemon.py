@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import socketserver
+from collections import defaultdict
+from threading import Event, Lock, Thread
+
+from .omada import Omada, OmadaError
+
+#define Logger for class-wide usage
+logger = logging.getLogger(__name__)
+
+##
+## Default socket path for the session daemon.
+##
+DefaultSocket = os.path.expanduser( '~/.omada.sock' )
+
+##
+## Ask the session daemon for a logged-in session and return its state.
+##
+## Set 'expiredToken' to the token of a session that has stopped working. The daemon
+## only logs in again if that is still its current token, so many scripts finding
+## the same session expired cause a single login. Raises OSError if the daemon
+## cannot be reached and ConnectionError if it could not log in.
+##
+def requestSession(path=DefaultSocket, section='omada', expiredToken=None, timeout=5.0):
+
+	with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as sock:
+		sock.settimeout( timeout )
+		sock.connect( os.path.expanduser(path) )
+		sock.sendall( json.dumps({'section':section,'expiredToken':expiredToken}).encode() + b'\n' )
+		with sock.makefile('rb') as stream:
+			response = json.loads( stream.readline() )
+
+	if 'error' in response:
+		raise ConnectionError(response['error'])
+
+	return response
+
+##
+## Hold logged-in Omada sessions and hand them out over a Unix socket.
+##
+## Short-lived scripts that set 'daemon' in their configuration borrow a session
+## from here instead of logging in themselves. Sessions are checked at most once
+## every 'interval' seconds, which also keeps them from timing out, and logged in
+## again when they stop working.
+##
+class SessionDaemon:
+
+	def __init__(self, config='omada.cfg', path=DefaultSocket, interval=300):
+		self.config = config
+		self.path = path
+		self.interval = interval
+		self.sessions = {}
+		self.checked = {}
+		self.locks = defaultdict(Lock)
+		self.stopped = Event()
+		self.server = None
+
+	##
+	## Return the exported state of a logged-in session for the given section.
+	##
+	## If 'expiredToken' is the token of the current session, it is replaced.
+	##
+	def getSession(self, section='omada', expiredToken=None):
+
+		with self.locks[section]:
+
+			omada = self.sessions.get( section )
+			if omada is None:
+				omada = self.sessions[section] = Omada( self.config, section=section )
+				# The scripts' configuration may point at this daemon; never ask ourselves.
+				omada.daemon = None
+
+			if omada.loginResult is not None:
+				if expiredToken is not None and omada.loginResult['token'] == expiredToken:
+					self.__reset( omada )
+				elif time.monotonic() - self.checked.get( section, 0 ) >= self.interval:
+					try:
+						status = omada.getLoginStatus()
+						if isinstance(status, dict) and status.get('login') is False:
+							self.__reset( omada )
+					except (OmadaError, OSError):
+						self.__reset( omada )
+
+			if omada.loginResult is None:
+				logger.info( f'logging in to "{section}"' )
+				omada.login()
+
+			self.checked[section] = time.monotonic()
+			return omada.exportSession()
+
+	##
+	## Forget a session that is no longer valid on the controller.
+	##
+	def __reset(self, omada):
+		omada.loginResult = None
+		omada.session.cookies.clear()
+
+	##
+	## Check every session periodically so they are kept alive.
+	##
+	def __keepAlive(self):
+		while not self.stopped.wait( self.interval ):
+			for section in list(self.sessions):
+				try:
+					self.getSession( section )
+				except Exception as ex:
+					logger.warning( f'could not refresh "{section}": {ex}' )
+
+	##
+	## Serve session requests until stopped.
+	##
+	def serve(self):
+
+		daemon = self
+
+		class Handler(socketserver.StreamRequestHandler):
+			def handle(self):
+				try:
+					request = json.loads( self.rfile.readline() )
+					response = daemon.getSession( request.get('section', 'omada'), request.get('expiredToken') )
+				except Exception as ex:
+					response = {'error': str(ex)}
+				self.wfile.write( json.dumps(response).encode() + b'\n' )
+
+		if os.path.exists( self.path ):
+			os.unlink( self.path )
+
+		# The socket hands out session tokens, so only the owner may connect.
+		umask = os.umask( 0o077 )
+		try:
+			self.server = socketserver.ThreadingUnixStreamServer( self.path, Handler )
+		finally:
+			os.umask( umask )
+
+		Thread( target=self.__keepAlive, daemon=True ).start()
+
+		try:
+			self.server.serve_forever()
+		finally:
+			self.server.server_close()
+			if os.path.exists( self.path ):
+				os.unlink( self.path )
+
+	##
+	## Stop serving and log out of every session.
+	##
+	def stop(self):
+
+		self.stopped.set()
+
+		if self.server is not None:
+			self.server.shutdown()
+
+		for omada in self.sessions.values():
+			try:
+				omada.logout()
+			except Exception:
+				pass
+
+def main(argv=None):
+
+	parser = argparse.ArgumentParser( prog='python -m omada.daemon', description='Hold logged-in Omada sessions for short-lived scripts.' )
+	parser.add_argument( 'config', nargs='?', default='omada.cfg', help='configuration file (default: omada.cfg)' )
+	parser.add_argument( '--socket', default=DefaultSocket, help=f'socket path (default: {DefaultSocket})' )
+	parser.add_argument( '--interval', type=int, default=300, help='seconds between session checks (default: 300)' )
+	args = parser.parse_args( argv )
+
+	logging.basicConfig( level=logging.INFO )
+
+	daemon = SessionDaemon( args.config, args.socket, args.interval )
+	try:
+		daemon.serve()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		daemon.stop()
+
+if __name__ == '__main__':
+	sys.exit( main() )
@@ -0,0 +1,159 @@
+import os
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
+
+from .omada import Omada
+
+##
+## Results of a fleet-wide call.
+##
+## 'results' maps each controller name to its return value, and 'errors' maps
+## each controller that failed to the exception it raised.
+##
+class FleetResult:
+
+	def __init__(self):
+		self.results = OrderedDict()
+		self.errors = OrderedDict()
+
+	def __iter__(self):
+		return iter( self.results.items() )
+
+	def __repr__(self):
+		return f'FleetResult(results={list(self.results)}, errors={dict(self.errors)})'
+
+	##
+	## Return True if every controller succeeded.
+	##
+	@property
+	def ok(self):
+		return len(self.errors) == 0
+
+	##
+	## Return a flat list of records from every controller, tagged with 'controller'.
+	##
+	## This expects each result to be a list of dicts, as returned by the paged methods.
+	##
+	def records(self):
+		records = []
+		for name, result in self.results.items():
+			for record in result or []:
+				record['controller'] = name
+				records.append( record )
+		return records
+
+##
+## Manage one Omada instance per controller and call methods on all of them in parallel.
+##
+## Controllers are read from every configuration section named 'omada' or starting
+## with 'omada:', e.g. '[omada:office]' is the controller named 'office'. Settings
+## shared by all controllers, like the username and password, can go in '[DEFAULT]'.
+##
+## Each controller keeps its own logged-in session and connection pool for the life
+## of the fleet, so the login handshake is only paid once per controller.
+##
+class OmadaFleet:
+
+	##
+	## Initialize a fleet from the given configuration file.
+	##
+	## Extra keyword arguments are passed on to each Omada instance.
+	##
+	def __init__(self, config='omada.cfg', concurrency=None, **kwargs):
+
+		if not os.path.isfile( config ):
+			raise FileNotFoundError(config)
+
+		parser = ConfigParser()
+		parser.read( config )
+
+		self.controllers = OrderedDict()
+		for section in parser.sections():
+			if section == 'omada':
+				self.controllers['omada'] = Omada( config, section=section, **kwargs )
+			elif section.startswith('omada:'):
+				self.controllers[section[6:]] = Omada( config, section=section, **kwargs )
+
+		if len(self.controllers) == 0:
+			raise ValueError(f'no controllers found in "{config}"')
+
+		self.executor = ThreadPoolExecutor( max_workers=concurrency or len(self.controllers) )
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def __getitem__(self, name):
+		return self.controllers[name]
+
+	def __len__(self):
+		return len(self.controllers)
+
+	##
+	## Allow any Omada method to be called on the fleet, e.g. fleet.getSiteDevices().
+	##
+	def __getattr__(self, name):
+		if name.startswith('_') or not callable( getattr(Omada, name, None) ):
+			raise AttributeError(name)
+		return lambda *args, **kwargs: self.call( name, *args, **kwargs )
+
+	##
+	## Call an Omada method on one controller, logging in first if needed.
+	##
+	def __callOne(self, omada, method, args, kwargs):
+
+		if method not in ('login', 'logout') and omada.loginResult is None:
+			omada.login()
+
+		result = getattr(omada, method)( *args, **kwargs )
+
+		# Drain paged results here so the requests run in this worker. Besides
+		# generators, these can be islice or map objects wrapping one.
+		if isinstance(result, Iterator):
+			result = list( result )
+
+		return result
+
+	##
+	## Call an Omada method on every controller in parallel and return a FleetResult.
+	##
+	## Errors are collected per controller and never stop the other controllers.
+	##
+	def call(self, method, *args, **kwargs):
+
+		futures = OrderedDict(
+			(name, self.executor.submit(self.__callOne, omada, method, args, kwargs))
+			for name, omada in self.controllers.items()
+		)
+
+		fleetResult = FleetResult()
+		for name, future in futures.items():
+			try:
+				fleetResult.results[name] = future.result()
+			except Exception as ex:
+				fleetResult.errors[name] = ex
+
+		return fleetResult
+
+	##
+	## Log in to every controller that is not already logged in.
+	##
+	def login(self):
+		return self.call( 'login' )
+
+	##
+	## Log out of every controller.
+	##
+	def logout(self):
+		return self.call( 'logout' )
+
+	##
+	## Log out of every controller and release the worker threads.
+	##
+	def close(self):
+		self.logout()
+		self.executor.shutdown()
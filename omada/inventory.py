@@ -0,0 +1,172 @@
+import json
+import sqlite3
+from threading import Lock
+
+from .omada import timestamp
+
+##
+## A local SQLite store of client and device snapshots.
+##
+## Each snapshot compares the records from the controller with the last known
+## state and only writes what changed. The 'clients' and 'devices' tables hold the
+## current state of every MAC seen, and the history tables get one row each time a
+## MAC appears, moves, changes address, or disappears. Times are in milliseconds,
+## like the Omada API.
+##
+## Questions like "which AP was this MAC on yesterday" are then answered locally:
+##
+##   inventory.locateClient('AA-BB-CC-DD-EE-FF', yesterday)
+##
+class Inventory:
+
+	##
+	## The fields whose changes are recorded for each kind of record.
+	##
+	ClientFields = ('name', 'ip', 'apName', 'ssid', 'networkName', 'switchName', 'port', 'connectDevType')
+	DeviceFields = ('name', 'ip', 'type', 'model', 'showModel', 'version', 'status')
+
+	def __init__(self, omada, path='omada-inventory.db'):
+		self.omada = omada
+		self.db = sqlite3.connect( path, check_same_thread=False )
+		self.db.row_factory = sqlite3.Row
+		self.lock = Lock()
+		self.__createTables( 'clients', Inventory.ClientFields )
+		self.__createTables( 'devices', Inventory.DeviceFields )
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def close(self):
+		self.db.close()
+
+	##
+	## Create the current state and history tables for one kind of record.
+	##
+	def __createTables(self, table, fields):
+
+		columns = ', '.join( fields )
+
+		with self.db:
+			self.db.execute( f'CREATE TABLE IF NOT EXISTS {table} (site TEXT, mac TEXT, {columns}, present INTEGER, firstSeen INTEGER, lastSeen INTEGER, data TEXT, PRIMARY KEY (site, mac))' )
+			self.db.execute( f'CREATE INDEX IF NOT EXISTS {table}_ip ON {table} (ip)' )
+			self.db.execute( f'CREATE INDEX IF NOT EXISTS {table}_mac ON {table} (mac)' )
+			self.db.execute( f'CREATE TABLE IF NOT EXISTS {table}_history (time INTEGER, site TEXT, mac TEXT, {columns}, present INTEGER)' )
+			self.db.execute( f'CREATE INDEX IF NOT EXISTS {table}_history_mac ON {table}_history (mac, time)' )
+			self.db.execute( f'CREATE INDEX IF NOT EXISTS {table}_history_ip ON {table}_history (ip, time)' )
+			self.db.execute( f'CREATE INDEX IF NOT EXISTS {table}_history_site ON {table}_history (site, time)' )
+			self.db.execute( f'CREATE INDEX IF NOT EXISTS {table}_history_time ON {table}_history (time)' )
+
+	##
+	## Store the records for the given sites, writing only what changed.
+	##
+	## Returns the number of history rows written.
+	##
+	def __snapshot(self, table, fields, records, sites):
+
+		now = timestamp()
+		marks = ','.join( '?' * len(sites) )
+		columns = ', '.join( fields )
+
+		def values(record):
+			return tuple( json.dumps(record.get(field)) if isinstance(record.get(field), (dict, list)) else record.get(field) for field in fields )
+
+		current = {}
+		for record in records:
+			current[(record['site'], record['mac'])] = record
+
+		with self.lock, self.db:
+
+			known = {}
+			for row in self.db.execute( f'SELECT site, mac, {columns}, present FROM {table} WHERE site IN ({marks})', sites ):
+				known[(row['site'], row['mac'])] = (tuple( row[field] for field in fields ), row['present'])
+
+			changed, seen, history = [], [], []
+
+			for key, record in current.items():
+				row = values( record )
+				if key in known and known[key] == (row, 1):
+					seen.append( (now,) + key )
+				else:
+					changed.append( key + row + (now, now, json.dumps(record)) )
+					history.append( (now,) + key + row + (1,) )
+
+			gone = [key for key, (row, present) in known.items() if present and key not in current]
+			for key in gone:
+				history.append( (now,) + key + known[key][0] + (0,) )
+
+			placeholders = ','.join( '?' * len(fields) )
+			self.db.executemany( f'INSERT INTO {table} (site, mac, {columns}, present, firstSeen, lastSeen, data) VALUES (?,?,{placeholders},1,?,?,?) '
+				f'ON CONFLICT (site, mac) DO UPDATE SET {", ".join(f"{field}=excluded.{field}" for field in fields)}, present=1, lastSeen=excluded.lastSeen, data=excluded.data',
+				changed )
+			self.db.executemany( f'UPDATE {table} SET lastSeen=? WHERE site=? AND mac=?', seen )
+			self.db.executemany( f'UPDATE {table} SET present=0 WHERE site=? AND mac=?', gone )
+			self.db.executemany( f'INSERT INTO {table}_history (time, site, mac, {columns}, present) VALUES (?,?,?,{placeholders},?)', history )
+
+		return len(history)
+
+	##
+	## Take a snapshot of the active clients for the given sites (default: the current site).
+	##
+	def snapshotClients(self, sites=None):
+		sites = sites or [self.omada.site]
+		return self.__snapshot( 'clients', Inventory.ClientFields, self.omada.getAllSiteClients(sites), sites )
+
+	##
+	## Take a snapshot of the devices for the given sites (default: the current site).
+	##
+	def snapshotDevices(self, sites=None):
+		sites = sites or [self.omada.site]
+		return self.__snapshot( 'devices', Inventory.DeviceFields, self.omada.getAllSiteDevices(sites), sites )
+
+	##
+	## Return the history rows matching the given MAC, IP, site, and time range, oldest first.
+	##
+	def __history(self, table, mac=None, ip=None, site=None, start=None, end=None):
+
+		where, args = [], []
+		for column, op, value in (('mac','=',mac), ('ip','=',ip), ('site','=',site), ('time','>=',start), ('time','<=',end)):
+			if value is not None:
+				where.append( f'{column} {op} ?' )
+				args.append( value )
+
+		sql = f'SELECT * FROM {table}_history' + (' WHERE ' + ' AND '.join(where) if where else '') + ' ORDER BY time'
+		with self.lock:
+			return [dict(row) for row in self.db.execute( sql, args )]
+
+	def clientHistory(self, mac=None, ip=None, site=None, start=None, end=None):
+		return self.__history( 'clients', mac, ip, site, start, end )
+
+	def deviceHistory(self, mac=None, ip=None, site=None, start=None, end=None):
+		return self.__history( 'devices', mac, ip, site, start, end )
+
+	##
+	## Return the state of a client at the given time, or None if it was not connected.
+	##
+	def locateClient(self, mac, time):
+		with self.lock:
+			row = self.db.execute( 'SELECT * FROM clients_history WHERE mac = ? AND time <= ? ORDER BY time DESC LIMIT 1', (mac, time) ).fetchone()
+		return dict(row) if row is not None and row['present'] else None
+
+	##
+	## Return the current rows for clients or devices, filtered by site, IP, and presence.
+	##
+	def __current(self, table, site=None, ip=None, present=True):
+
+		where, args = [], []
+		for column, value in (('site',site), ('ip',ip), ('present',None if present is None else int(present))):
+			if value is not None:
+				where.append( f'{column} = ?' )
+				args.append( value )
+
+		sql = f'SELECT * FROM {table}' + (' WHERE ' + ' AND '.join(where) if where else '')
+		with self.lock:
+			return [dict(row) for row in self.db.execute( sql, args )]
+
+	def clients(self, site=None, ip=None, present=True):
+		return self.__current( 'clients', site, ip, present )
+
+	def devices(self, site=None, ip=None, present=True):
+		return self.__current( 'devices', site, ip, present )
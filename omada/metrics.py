@@ -0,0 +1,161 @@
+import bisect
+from threading import Lock
+
+##
+## Counters for one method and endpoint.
+##
+class EndpointStats:
+
+	__slots__ = ('requests', 'pages', 'bytes', 'seconds', 'maxSeconds', 'buckets', 'errors')
+
+	def __init__(self, buckets):
+		self.requests = 0
+		self.pages = 0
+		self.bytes = 0
+		self.seconds = 0.0
+		self.maxSeconds = 0.0
+		self.buckets = [0] * (len(buckets) + 1)
+		self.errors = {}
+
+##
+## Request metrics for each endpoint.
+##
+## Requests are labelled by method and endpoint template, e.g. 'GET' and
+## '/sites/{site}/clients', so all sites share one set of counters. For each
+## label the number of requests, pages, response bytes, errors by code and a
+## latency histogram are kept. Every attempt counts as a request, retries
+## included.
+##
+## Error codes are the Omada errorCode for API errors, 'http<status>' for HTTP
+## errors, and the exception name for anything else.
+##
+##   omada = Omada( metrics=True )
+##   ...
+##   print( omada.metrics.prometheus() )
+##
+class Metrics:
+
+	##
+	## Latency histogram bucket bounds in seconds.
+	##
+	Buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+	def __init__(self, buckets=None):
+		self.buckets = tuple( sorted(buckets) ) if buckets else Metrics.Buckets
+		self.lock = Lock()
+		self.stats = {}
+
+	def __stats(self, method, endpoint):
+		key = (method, endpoint)
+		stats = self.stats.get( key )
+		if stats is None:
+			stats = self.stats[key] = EndpointStats( self.buckets )
+		return stats
+
+	##
+	## Record one request.
+	##
+	def observe(self, method, endpoint, seconds, size=0, error=None, page=False):
+
+		bucket = bisect.bisect_left( self.buckets, seconds )
+
+		with self.lock:
+			stats = self.__stats( method, endpoint )
+			stats.requests += 1
+			stats.bytes += size
+			stats.seconds += seconds
+			stats.buckets[bucket] += 1
+			if seconds > stats.maxSeconds:
+				stats.maxSeconds = seconds
+			if page:
+				stats.pages += 1
+			if error is not None:
+				stats.errors[error] = stats.errors.get( error, 0 ) + 1
+
+	##
+	## Add response bytes that were read after the request was recorded.
+	##
+	def addBytes(self, method, endpoint, size):
+		with self.lock:
+			self.__stats( method, endpoint ).bytes += size
+
+	##
+	## Clear all counters.
+	##
+	def reset(self):
+		with self.lock:
+			self.stats = {}
+
+	##
+	## Return a copy of the counters, keyed by 'METHOD /endpoint'.
+	##
+	## Histogram buckets are cumulative and keyed by their upper bound, with
+	## float('inf') as the last bound.
+	##
+	def snapshot(self):
+
+		snapshot = {}
+		bounds = self.buckets + (float('inf'),)
+
+		with self.lock:
+			for (method, endpoint), stats in self.stats.items():
+				total = 0
+				buckets = {}
+				for bound, count in zip( bounds, stats.buckets ):
+					total += count
+					buckets[bound] = total
+				snapshot[f'{method} {endpoint}'] = {
+					'method': method,
+					'endpoint': endpoint,
+					'requests': stats.requests,
+					'pages': stats.pages,
+					'bytes': stats.bytes,
+					'errors': dict( stats.errors ),
+					'seconds': stats.seconds,
+					'maxSeconds': stats.maxSeconds,
+					'meanSeconds': stats.seconds / stats.requests if stats.requests else 0.0,
+					'buckets': buckets,
+				}
+
+		return snapshot
+
+	##
+	## Return the counters in the Prometheus text exposition format.
+	##
+	def prometheus(self, prefix='omada'):
+
+		def labels(entry, **extra):
+			pairs = dict( method=entry['method'], endpoint=entry['endpoint'], **extra )
+			return ','.join( f'{key}="{escape(value)}"' for key, value in pairs.items() )
+
+		def escape(value):
+			return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+		snapshot = self.snapshot().values()
+		lines = []
+
+		lines.append( f'# HELP {prefix}_request_duration_seconds Omada API request latency.' )
+		lines.append( f'# TYPE {prefix}_request_duration_seconds histogram' )
+		for entry in snapshot:
+			for bound, count in entry['buckets'].items():
+				le = '+Inf' if bound == float('inf') else repr(bound)
+				lines.append( f'{prefix}_request_duration_seconds_bucket{{{labels(entry, le=le)}}} {count}' )
+			lines.append( f'{prefix}_request_duration_seconds_sum{{{labels(entry)}}} {entry["seconds"]!r}' )
+			lines.append( f'{prefix}_request_duration_seconds_count{{{labels(entry)}}} {entry["requests"]}' )
+
+		for name, key, help in (
+			('response_bytes_total', 'bytes', 'Omada API response bytes.'),
+			('pages_total', 'pages', 'Omada API pages fetched.'),
+		):
+			lines.append( f'# HELP {prefix}_{name} {help}' )
+			lines.append( f'# TYPE {prefix}_{name} counter' )
+			for entry in snapshot:
+				lines.append( f'{prefix}_{name}{{{labels(entry)}}} {entry[key]}' )
+
+		lines.append( f'# HELP {prefix}_request_errors_total Omada API request errors by code.' )
+		lines.append( f'# TYPE {prefix}_request_errors_total counter' )
+		for entry in snapshot:
+			for code, count in entry['errors'].items():
+				lines.append( f'{prefix}_request_errors_total{{{labels(entry, code=code)}}} {count}' )
+
+		return '\n'.join( lines ) + '\n'
@@ -1,23 +1,49 @@
 
 import os
+import re
 import json
+import time
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
 import warnings
-import http.client
 import logging
-from configparser import ConfigParser
+from collections import deque
+from itertools import islice
+from threading import Event, RLock
 from datetime import datetime
 from enum import Enum
 from requests.cookies import RequestsCookieJar
 
+# The modules behind opt-in features (the cache, retries, streaming, typed records,
+# columns, settings handles, metrics, queries, and threads) are imported where the
+# feature is first used, so 'from omada import Omada' stays quick.
+
 #define Logger for class-wide usage
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-ch = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-ch.setFormatter(formatter)
-logger.addHandler(ch)
+
+# handler added by enableDebugLogging()
+debugHandler = None
+
+##
+## Log this package and urllib3 at debug level to stderr.
+##
+## This is what 'verbose' turns on. Only these loggers are changed, never the root
+## logger, and the handler is only added once.
+##
+def enableDebugLogging():
+
+	global debugHandler
+	if debugHandler is not None:
+		return
+
+	debugHandler = logging.StreamHandler()
+	debugHandler.setFormatter( logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s') )
+
+	for name in ('omada', 'urllib3'):
+		log = logging.getLogger( name )
+		log.setLevel( logging.DEBUG )
+		log.addHandler( debugHandler )
 
 ##
 ## Omada API calls expect a timestamp in milliseconds.
@@ -84,12 +110,57 @@ class Omada:
 	##
 	## Initialize a new Omada API instance.
 	##
-	def __init__(self, config='omada.cfg', baseurl=None, site='Default', verify=True, warnings=True, verbose=False):
+	## Set 'prefetch' to the number of pages to fetch concurrently when iterating
+	## paged endpoints. The default of 0 fetches one page at a time on demand.
+	##
+	## Paged requests start at 'pagesize' rows per page. If the controller rejects
+	## the page size, smaller sizes are tried down to 'currentPageSize', then the
+	## largest accepted size is searched for. It is remembered for each endpoint.
+	##
+	## Settings are read from the 'section' of the configuration file.
+	##
+	## Set 'cache' to True, or to a ResponseCache instance, to cache the results of
+	## read-mostly GET requests. Writes invalidate the cached entries they affect.
+	##
+	## Set 'daemon' to the socket path of a running session daemon to borrow its
+	## logged-in session instead of logging in. See omada.daemon for details.
+	##
+	## Set 'retry' to True, or to a RetryPolicy instance, to retry failed requests,
+	## log in again when the session expires, and stop calling a failing controller.
+	##
+	## Set 'stream' to decode paged results one item at a time as they are read from
+	## the response, so memory use stays flat no matter how large the pages are.
+	##
+	## Set 'metrics' to True, or to a Metrics instance, to record the latency, size,
+	## page count and errors of requests to each endpoint. See omada.metrics.
+	##
+	## An instance can be shared by many threads. The 'poolsize' is the number of
+	## connections kept alive for reuse, and should be at least the number of
+	## threads making requests at once, including prefetch and fan-out threads.
+	##
+	def __init__(self, config='omada.cfg', baseurl=None, site='Default', verify=True, warnings=True, verbose=False, prefetch=0, pagesize=1000, section='omada', cache=None, daemon=None, retry=None, stream=False, metrics=None, poolsize=32):
 
 		self.config = None
+		self.section = section
+		self.cache = None
+		self.daemon = daemon
+		self.borrowed = False
+		self.retry = None
+		self.breaker = None
+		self.metrics = None
+		self.credentials = (None, None)
+		self.loginLock = RLock()
 		self.loginResult = None
+		self.stream = stream
+		self.chunkSize = 65536
 		self.currentPageSize = 10
+		self.maxPageSize = pagesize
+		self.pageSizes = {}
+		self.timeFilters = {}
 		self.currentUser = {}
+		self.siteKeys = {}
+		self.siteNames = {}
+		self.siteKeysFolded = {}
 		self.apiPath = Omada.ApiPath
 		self.omadacId = ''
 
@@ -100,27 +171,70 @@ class Omada:
 			self.verify   = verify
 			self.warnings = warnings
 			self.verbose  = verbose
+			self.prefetch = prefetch
+			self.poolsize = poolsize
 		elif os.path.isfile( config ):
 			# read from configuration file
+			from configparser import ConfigParser
 			self.config = ConfigParser()
 			try:
 				self.config.read( config )
-				self.baseurl  = self.config['omada'].get('baseurl')
-				self.site     = self.config['omada'].get('site', 'Default')
-				self.verify   = self.config['omada'].getboolean('verify', True)
-				self.warnings = self.config['omada'].getboolean('warnings', True)
-				self.verbose  = self.config['omada'].getboolean('verbose', False)
+				self.baseurl  = self.config[self.section].get('baseurl')
+				self.site     = self.config[self.section].get('site', 'Default')
+				self.verify   = self.config[self.section].getboolean('verify', True)
+				self.warnings = self.config[self.section].getboolean('warnings', True)
+				self.verbose  = self.config[self.section].getboolean('verbose', False)
+				self.prefetch = self.config[self.section].getint('prefetch', prefetch)
+				self.poolsize = self.config[self.section].getint('poolsize', poolsize)
+				if cache is None and self.config[self.section].getboolean('cache', False):
+					cache = True
+				self.maxPageSize = self.config[self.section].getint('pagesize', pagesize)
+				self.daemon   = self.config[self.section].get('daemon', daemon)
+				self.stream   = self.config[self.section].getboolean('stream', stream)
+				if retry is None and self.config[self.section].getint('retries', 0) > 0:
+					from .retry import RetryPolicy
+					retry = RetryPolicy( retries=self.config[self.section].getint('retries') )
+				if metrics is None and self.config[self.section].getboolean('metrics', False):
+					metrics = True
 			except:
 				raise
 		else:
 			# could not find configuration
 			raise FileNotFoundError(config)
 
+		# set up request metrics
+		if metrics is True:
+			from .metrics import Metrics
+			self.metrics = Metrics()
+		elif metrics:
+			self.metrics = metrics
+
+		# set up the response cache
+		if cache is True:
+			from .cache import ResponseCache
+			self.cache = ResponseCache()
+		elif cache is not None and cache is not False:
+			self.cache = cache
+
+		# set up the retry policy and circuit breaker
+		if retry is True:
+			from .retry import RetryPolicy
+			retry = RetryPolicy()
+		if retry:
+			from .retry import CircuitBreaker
+			self.retry = retry
+			self.breaker = CircuitBreaker( retry.breakerThreshold, retry.breakerTimeout )
+
 		# set up requests session and cookies
 		self.session = requests.Session()
 		self.session.cookies = RequestsCookieJar()
 		self.session.verify = self.verify
 
+		# keep enough connections alive for every thread to reuse one
+		adapter = HTTPAdapter( pool_connections=self.poolsize, pool_maxsize=self.poolsize )
+		self.session.mount( 'https://', adapter )
+		self.session.mount( 'http://', adapter )
+
 		# hide warnings about insecure SSL requests
 		if self.verify == False and self.warnings == False:
 			urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -128,13 +242,10 @@ class Omada:
 		# enable verbose output
 		if self.verbose:
 			# set debug level in http.client
+			import http.client
 			http.client.HTTPConnection.debuglevel = 1
-			# initialize logger
-			logging.basicConfig()
-			logging.getLogger().setLevel(logging.DEBUG)
-			# configure logging for requests
-			logger.setLevel(logging.DEBUG)
-			logger.propagate = True
+			# log this package and urllib3 without changing the root logger
+			enableDebugLogging()
 
 	##
 	## Build a URL for the provided path.
@@ -142,84 +253,254 @@ class Omada:
 	def __buildUrl(self, path):
 		return self.baseurl + self.omadacId + self.apiPath + path
 
+	##
+	## Return the endpoint template for a path, e.g. '/sites/{site}/clients'.
+	##
+	def __endpoint(self, path):
+		return re.sub( r'^/sites/[^/]+', '/sites/{site}', path )
+
+	##
+	## Return the scope of this controller's entries in a shared response cache.
+	##
+	def __cacheScope(self):
+		return (self.baseurl, self.omadacId)
+
+	##
+	## Index the sites in the privilege list by name, key, and case-folded name.
+	##
+	def __indexSites(self):
+
+		sites = self.currentUser['privilege']['sites'] if self.currentUser else []
+
+		self.siteKeys = {site['name']: site['key'] for site in sites}
+		self.siteNames = {site['key']: site['name'] for site in sites}
+		self.siteKeysFolded = {site['name'].casefold(): site['key'] for site in sites}
+
+	##
+	## Look up a site key in the index given the name or key.
+	##
+	def __lookupKey(self, name):
+
+		if name in self.siteKeys: return self.siteKeys[name]
+		if name in self.siteNames: return name
+		return self.siteKeysFolded.get( name.casefold() )
+
 	##
 	## Look up a site key given the name.
 	##
+	## The name can also be a site key or differ in case. If the site is not found,
+	## the site list is refreshed once in case it was added since login.
+	##
 	def __findKey(self, name=None):
 
 		# Use the stored site if not provided.
 		if name is None: name = self.site
 
-		# Look for the site in the privilege list.
-		for site in self.currentUser['privilege']['sites']:
-			if site['name'] == name: return site['key']
+		key = self.__lookupKey( name )
+		if key is None:
+			self.refreshSites()
+			key = self.__lookupKey( name )
+
+		if key is None:
+			raise PermissionError(f'current user does not have privilege to site "{name}"')
+
+		return key
+
+	##
+	## Send a request and return the decoded response, retrying as set by the retry policy.
+	##
+	## Set 'token' to add the timestamp and token parameters most calls expect. They
+	## are set again on every attempt, since logging in again changes the token.
+	##
+	## Set 'raw' to return the response without reading the body, for streaming.
+	##
+	def __request(self, method, path, params, token=True, raw=False, **kwargs):
+
+		retry = self.retry
+		attempt = 0
+
+		while True:
+
+			if retry is not None:
+				self.breaker.check( self.baseurl )
+
+			sentToken = self.loginResult['token']
+			if token:
+				params = dict( params, _=timestamp(), token=sentToken )
+
+			relogin = transient = False
+			started = time.perf_counter()
+			size = 0
+			try:
+				response = self.session.request( method, self.__buildUrl(path), params=params, **kwargs )
+				response.raise_for_status()
+				if raw:
+					self.__observe( method, path, params, started )
+					if retry is not None:
+						self.breaker.success()
+					return response
+				size = len( response.content )
+				json = response.json()
+				if retry is not None:
+					self.breaker.success()
+				if json['errorCode'] == 0:
+					self.__observe( method, path, params, started, size )
+					return json
+				error = OmadaError(json)
+				relogin = retry is not None and error.errorCode in retry.reloginCodes
+			except requests.HTTPError as ex:
+				error = ex
+				if retry is not None:
+					relogin = ex.response.status_code == 401
+					transient = ex.response.status_code in retry.statusCodes
+			except (requests.ConnectionError, requests.Timeout) as ex:
+				error = ex
+				transient = True
+
+			self.__observe( method, path, params, started, size, error )
+
+			if retry is None:
+				raise error
+
+			if transient:
+				self.breaker.failure()
+
+			# Writes are only repeated when the controller rejected them unapplied.
+			if attempt >= retry.retries or not (relogin or (transient and method == 'GET')):
+				raise error
+
+			if relogin:
+				logger.info( f'session expired, logging in again ({error})' )
+				self.__relogin( sentToken )
+			else:
+				logger.info( f'retrying {method} {path} ({error})' )
+				time.sleep( retry.delay(attempt) )
+
+			# Uploads must be read again from the start.
+			for file in (kwargs.get('files') or {}).values():
+				if isinstance(file, tuple) and hasattr(file[1], 'seek'):
+					file[1].seek( 0 )
+
+			attempt += 1
+
+	##
+	## Record a request in the metrics, if enabled.
+	##
+	def __observe(self, method, path, params, started, size=0, error=None):
+
+		if self.metrics is None:
+			return
+
+		if error is None:
+			code = None
+		elif isinstance(error, OmadaError):
+			code = str( error.errorCode )
+		elif isinstance(error, requests.HTTPError):
+			code = f'http{error.response.status_code}'
+		else:
+			code = type(error).__name__
+
+		self.metrics.observe( method, self.__endpoint(path), time.perf_counter() - started, size, code, 'currentPage' in params )
+
+	##
+	## Count the bytes of a streamed response as they are read.
+	##
+	def __countBytes(self, method, path, chunks):
+		endpoint = self.__endpoint( path )
+		for chunk in chunks:
+			self.metrics.addBytes( method, endpoint, len(chunk) )
+			yield chunk
+
+	##
+	## Log in again after the session has expired.
+	##
+	## If another thread already replaced the expired token, its new session is used.
+	## The expired session stays in place until the new one is ready, so other threads
+	## never see the client logged out. Their requests fail with the expired token and
+	## wait here on 'loginLock' until the new token can be used.
+	##
+	def __relogin(self, expiredToken):
+
+		with self.loginLock:
 
-		raise PermissionError(f'current user does not have privilege to site "{name}"')
+			if self.loginResult is not None and self.loginResult['token'] != expiredToken:
+				return
+
+			if self.borrowed:
+				# Ask the daemon for a new session rather than replacing its own.
+				from .daemon import requestSession
+				self.importSession( requestSession(self.daemon, self.section, expiredToken) )
+			else:
+				self.__login( *self.credentials )
 
 	##
 	## Perform a GET request and return the result.
 	##
-	def __get(self, path, params={}, data=None, json=None):
+	def __get(self, path, params=None, data=None, json=None):
 
 		if self.loginResult is None:
 			raise ConnectionError('not logged in')
 
+		if params is None: params = {}
+
 		if not isinstance(params, dict):
 			raise TypeError('params must be a dictionary')
 
-		response = self.session.get( self.__buildUrl(path), params=params, data=data, json=json, headers=self.session.headers )
-		response.raise_for_status()
+		if self.cache is not None:
+			hit, result = self.cache.get( path, params, self.__cacheScope() )
+			if hit: return result
 
-		json = response.json()
-		if json['errorCode'] == 0:
-			return json['result'] if 'result' in json else None
+		json = self.__request( 'GET', path, params, token=False, data=data, json=json, headers=self.session.headers )
+		result = json['result'] if 'result' in json else None
 
-		raise OmadaError(json)
+		if self.cache is not None:
+			self.cache.put( self.__endpoint(path), path, params, result, self.__cacheScope() )
+
+		return result
 
 	##
 	## Perform a POST request and return the result.
 	##
-	def __post(self, path, params={}, data=None, files=None, json=None):
+	def __post(self, path, params=None, data=None, files=None, json=None):
 
 		if self.loginResult is None:
 			raise ConnectionError('not logged in')
 
+		if params is None: params = {}
+
 		if not isinstance(params, dict):
 			raise TypeError('params must be a dictionary')
 
-		params['_'] = timestamp()
-		params['token'] = self.loginResult['token']
-		response = self.session.post( self.__buildUrl(path), params=params, data=data, files=files, json=json )
-		response.raise_for_status()
+		try:
+			json = self.__request( 'POST', path, params, data=data, files=files, json=json )
+		finally:
+			# Writes make any cached reads of this path stale.
+			if self.cache is not None:
+				self.cache.invalidate( path, self.__cacheScope() )
 
-		json = response.json()
-		if json['errorCode'] == 0:
-			return json['result'] if 'result' in json else None
-
-		raise OmadaError(json)
+		return json['result'] if 'result' in json else None
 
 	##
 	## Perform a PATCH request and return the result.
 	##
-	def __patch(self, path, params={}, data=None, json=None):
+	def __patch(self, path, params=None, data=None, json=None):
 
 		if self.loginResult is None:
 			raise ConnectionError('not logged in')
 
+		if params is None: params = {}
+
 		if not isinstance(params, dict):
 			raise TypeError('params must be a dictionary')
 
-		params['_'] = timestamp()
-		params['token'] = self.loginResult['token']
+		try:
+			json = self.__request( 'PATCH', path, params, data=data, json=json )
+		finally:
+			# Writes make any cached reads of this path stale.
+			if self.cache is not None:
+				self.cache.invalidate( path, self.__cacheScope() )
 
-		response = self.session.patch( self.__buildUrl(path), params=params, data=data, json=json )
-		response.raise_for_status()
-
-		json = response.json()
-		if json['errorCode'] == 0:
-			return json['result'] if 'result' in json else None
-
-		raise OmadaError(json)
+		return json['result'] if 'result' in json else None
 
 	##
 	## Return True if a result contains data.
@@ -230,33 +511,90 @@ class Omada:
 	##
 	## Perform a paged GET request and return the result.
 	##
-	def __getPaged(self, path, params={}, data=None, json=None):
+	def __getPaged(self, path, params=None, data=None, json=None, limit=None):
 
 		if self.loginResult is None:
 			raise ConnectionError('not logged in')
 
+		if params is None: params = {}
+
 		if not isinstance(params, dict):
 			raise TypeError('params must be a dictionary')
 
-		params['_'] = timestamp()
-		params['token'] = self.loginResult['token']
+		# The paging parameters are changed below, so never touch the caller's dict.
+		params = dict( params )
 
 		if 'currentPage' not in params:
 			params['currentPage'] = 1
 
-		if 'currentPageSize' not in params:
-			params['currentPageSize'] = self.currentPageSize
+		if 'currentPageSize' in params:
+			return self.__getPage( path, params, data, json )
 
-		response = self.session.get( self.__buildUrl(path), params=params, data=data, json=json )
-		response.raise_for_status()
+		# Start with the largest page size known to work for this endpoint.
+		endpoint = self.__endpoint( path )
+		accepted = self.pageSizes.get( endpoint, self.maxPageSize )
+		pageSize = accepted if limit is None else max( 1, min(accepted, limit) )
+		rejected = None
 
-		json = response.json()
-		if json['errorCode'] == 0:
-			json['result']['path'] = path
-			json['result']['params'] = params
-			return json['result']
+		while True:
+			params['currentPageSize'] = pageSize
+			try:
+				result = self.__getPage( path, params, data, json )
+				break
+			except (OmadaError, requests.HTTPError) as error:
+				# The controller may reject large pages, so try a smaller one.
+				if not self.__rejectsPageSize( error ) or pageSize <= self.currentPageSize: raise
+				rejected = pageSize
+				pageSize = accepted = max( pageSize // 2, self.currentPageSize )
+
+		# Halving overshoots, e.g. from 1000 to 62 when the controller allows 100,
+		# so search for the largest size between the accepted and rejected ones.
+		if rejected is not None and params['currentPage'] == 1:
+			while rejected - accepted > 1:
+				size = (accepted + rejected) // 2
+				try:
+					result = self.__getPage( path, dict(params, currentPageSize=size), data, json )
+					accepted = size
+				except (OmadaError, requests.HTTPError) as error:
+					if not self.__rejectsPageSize( error ): raise
+					rejected = size
+			pageSize = accepted
+
+		# The controller may also cap the page size without complaint.
+		if int( result['currentSize'] ) < pageSize:
+			accepted = int( result['currentSize'] )
+
+		self.pageSizes[endpoint] = accepted
+		return result
 
-		raise OmadaError(json)
+	##
+	## Return True if an error means the controller rejected the page size.
+	##
+	def __rejectsPageSize(self, error):
+		if isinstance(error, OmadaError):
+			return error.errorCode == -1001
+		if isinstance(error, requests.HTTPError):
+			return error.response.status_code == 400
+		return False
+
+	##
+	## Return the largest page size to stream a path with, found as in __getPaged.
+	##
+	def __findPageSize(self, path, params, data=None, json=None, limit=None):
+		params = {name: value for name, value in params.items() if name != 'currentPageSize'}
+		self.__getPaged( path, params, data, json )
+		pageSize = self.pageSizes[self.__endpoint( path )]
+		return pageSize if limit is None else max( 1, min(pageSize, limit) )
+
+	##
+	## Perform a GET request for a single page and return the result.
+	##
+	def __getPage(self, path, params, data=None, json=None):
+
+		json = self.__request( 'GET', path, params, data=data, json=json )
+		json['result']['path'] = path
+		json['result']['params'] = params
+		return json['result']
 
 	##
 	## Returns the next page of data if more is available.
@@ -289,12 +627,267 @@ class Omada:
 	##
 	## Perform a GET request and yield the results.
 	##
-	def __geterator(self, path, params={}, data=None, json=None):
-		result = self.__getPaged( path, params, data, json )
+	## Iteration stops after 'limit' items if provided.
+	##
+	def __geterator(self, path, params=None, data=None, json=None, limit=None):
+		if self.stream:
+			items = self.__streamPages( path, dict(params or {}), data, json, limit )
+		else:
+			result = self.__getPaged( path, params, data, json, limit )
+			if self.prefetch > 1 and self.__hasData( result ):
+				items = self.__prefetchPages( result, data, json, limit )
+			else:
+				items = self.__iteratePages( result )
+		if limit is not None:
+			items = islice( items, limit )
+		yield from items
+
+	##
+	## Yield the results of a paged request, decoding each item as it is read from the response.
+	##
+	## Pages are fetched one at a time and never held in memory as a whole. If the
+	## first page is rejected for its size, the size is found with __getPaged first.
+	##
+	def __streamPages(self, path, params, data=None, json=None, limit=None):
+
+		from .stream import PageStream
+
+		endpoint = self.__endpoint( path )
+		pageSize = params.get( 'currentPageSize' ) or self.pageSizes.get( endpoint, self.maxPageSize )
+		if limit is not None: pageSize = max( 1, min(pageSize, limit) )
+		page = int( params.get('currentPage', 1) )
+		relogged = False
+
+		while True:
+
+			params['currentPage'] = page
+			params['currentPageSize'] = pageSize
+			sentToken = self.loginResult['token']
+
+			try:
+				response = self.__request( 'GET', path, params, raw=True, stream=True, data=data, json=json )
+			except requests.HTTPError as error:
+				if page == 1 and pageSize > self.currentPageSize and self.__rejectsPageSize( error ):
+					pageSize = self.__findPageSize( path, params, data, json, limit )
+					continue
+				raise
+			chunks = response.iter_content( self.chunkSize )
+			if self.metrics is not None:
+				chunks = self.__countBytes( 'GET', path, chunks )
+			stream = PageStream( chunks )
+			count = 0
+			try:
+				for item in stream:
+					yield item
+					count += 1
+			finally:
+				response.close()
+
+			errorCode = int( stream.response.get('errorCode', 0) )
+			if errorCode != 0:
+				# Nothing from this page was yielded, so it can still be retried.
+				if count == 0 and not relogged and self.retry is not None and errorCode in self.retry.reloginCodes:
+					self.__relogin( sentToken )
+					relogged = True
+					continue
+				if count == 0 and page == 1 and pageSize > self.currentPageSize and errorCode == -1001:
+					pageSize = self.__findPageSize( path, params, data, json, limit )
+					continue
+				raise OmadaError(stream.response)
+
+			relogged = False
+			totalRows   = int( stream.result.get('totalRows', 0) )
+			currentSize = int( stream.result.get('currentSize', pageSize) )
+
+			if page == 1 and limit is None:
+				self.pageSizes[endpoint] = min( pageSize, currentSize )
+
+			if count == 0 or count + (page-1)*currentSize >= totalRows:
+				break
+
+			page += 1
+
+	##
+	## Yield the records of a paged request with a 'time' from 'start' to 'end'.
+	##
+	## The range is sent to the controller as filters.timeStart and filters.timeEnd.
+	## Records are returned newest first, so if the first record is newer than 'end'
+	## the controller ignored the filters. That is remembered for the endpoint, and
+	## the pages in the range are found by __searchPages instead.
+	##
+	def __timeRange(self, path, params, start=None, end=None):
+
+		from .query import Query, timeMillis
+
+		start = timeMillis( start ) if start is not None else None
+		end = timeMillis( end ) if end is not None else None
+		endpoint = self.__endpoint( path )
+
+		if self.timeFilters.get( endpoint ) is not False:
+
+			items = self.__geterator( path, Query(params).between(start, end).toParams() )
+			try:
+				for item in items:
+					if end is not None and item['time'] > end:
+						self.timeFilters[endpoint] = False
+						break
+					self.timeFilters[endpoint] = True
+					if start is not None and item['time'] < start:
+						return
+					yield item
+				else:
+					return
+			finally:
+				items.close()
+
+		yield from self.__searchPages( path, params, start, end )
+
+	##
+	## Yield the records of a paged request with a 'time' from 'start' to 'end', without time filters.
+	##
+	## Pages are sorted newest first, so the first page in the range is found with a
+	## binary search over the page numbers, comparing 'end' with the oldest record of
+	## each page. Pages are then read until a record is older than 'start'.
+	##
+	def __searchPages(self, path, params, start=None, end=None):
+
+		result = self.__getPaged( path, params )
+		if not self.__hasData( result ):
+			return
+
+		totalRows = int( result['totalRows'] )
+		pageSize  = int( result['currentSize'] )
+		lastPage  = max( 1, (totalRows + pageSize - 1) // pageSize )
+		pages     = {1: result['data']}
+
+		def getPage(page):
+			if page not in pages:
+				pages[page] = self.__getPaged( path, dict(params, currentPage=page, currentPageSize=pageSize) ).get( 'data' ) or []
+			return pages[page]
+
+		low, high = 1, lastPage
+		if end is not None:
+			while low < high:
+				middle = (low + high) // 2
+				data = getPage( middle )
+				if not data or data[-1]['time'] <= end:
+					high = middle
+				else:
+					low = middle + 1
+
+		for page in range(low, lastPage+1):
+			data = getPage( page )
+			pages.clear()
+			if not data:
+				return
+			for item in data:
+				if end is not None and item['time'] > end:
+					continue
+				if start is not None and item['time'] < start:
+					return
+				yield item
+
+	##
+	## Yield the results of a paged request, fetching each page after the previous one is used up.
+	##
+	def __iteratePages(self, result):
 		while self.__hasData( result ):
 			for item in result['data']: yield item
 			result = self.__nextPage( result )
 
+	##
+	## Yield the results of a paged request, fetching the remaining pages concurrently.
+	##
+	## The first page tells us 'totalRows', so the remaining page numbers are known up
+	## front. At most 'prefetch' pages are requested or buffered at once, and items are
+	## still yielded in page order.
+	##
+	def __prefetchPages(self, result, data=None, json=None, limit=None):
+
+		path   = result.pop('path')
+		params = result.pop('params')
+
+		totalRows   = int( result['totalRows'] )
+		if limit is not None: totalRows = min( totalRows, limit )
+		currentPage = int( result['currentPage'] )
+		currentSize = int( result['currentSize'] )
+		lastPage    = (totalRows + currentSize - 1) // currentSize
+
+		from concurrent.futures import ThreadPoolExecutor
+
+		pages = iter( range(currentPage+1, lastPage+1) )
+		pending = deque()
+		executor = ThreadPoolExecutor( max_workers=self.prefetch )
+
+		def submit():
+			page = next( pages, None )
+			if page is not None:
+				pending.append( executor.submit(self.__getPaged, path, dict(params, currentPage=page), data, json) )
+
+		try:
+			for _ in range(self.prefetch): submit()
+			for item in result['data']: yield item
+			while pending:
+				result = pending.popleft().result()
+				submit()
+				if not self.__hasData( result ): break
+				for item in result['data']: yield item
+		finally:
+			# don't wait on pages nobody will read
+			for future in pending: future.cancel()
+			executor.shutdown( wait=False )
+
+	##
+	## Call a site method for many sites concurrently and yield the merged results.
+	##
+	## Each record is tagged with the name of its site in 'site'. Records are yielded
+	## as soon as any site produces them, with at most 'concurrency' sites queried at
+	## once. Sites default to every site from getSites().
+	##
+	def __fanOut(self, method, sites=None, concurrency=8, **kwargs):
+
+		from concurrent.futures import ThreadPoolExecutor
+		from queue import Queue
+
+		if sites is None:
+			sites = [site['name'] for site in self.getSites()]
+
+		results = Queue()
+		stopped = Event()
+		done = object()
+
+		def worker(site):
+			try:
+				# sites still queued when the caller stops are skipped
+				if stopped.is_set(): return
+				for record in method( site=site, **kwargs ):
+					if stopped.is_set(): break
+					record['site'] = site
+					results.put( record )
+				results.put( done )
+			except Exception as ex:
+				results.put( ex )
+
+		executor = ThreadPoolExecutor( max_workers=max(1, concurrency) )
+		futures = []
+		try:
+			for site in sites:
+				futures.append( executor.submit(worker, site) )
+			remaining = len( sites )
+			while remaining:
+				record = results.get()
+				if record is done:
+					remaining -= 1
+				elif isinstance(record, Exception):
+					raise record
+				else:
+					yield record
+		finally:
+			# let the workers stop early if the caller is done
+			stopped.set()
+			for future in futures: future.cancel()
+			executor.shutdown( wait=False )
+
 	##
 	## Issue a warning if warnings are enabled.
 	##
@@ -324,6 +917,27 @@ class Omada:
 		# Only try to log in if we're not already logged in.
 		if self.loginResult is None:
 
+			# Borrow a logged-in session from the session daemon if there is one.
+			if self.daemon is not None and username is None and password is None:
+				from .daemon import requestSession
+				try:
+					self.importSession( requestSession(self.daemon, self.section) )
+					self.borrowed = True
+					return self.loginResult
+				except (OSError, ValueError) as ex:
+					logger.debug( f'session daemon unavailable: {ex}' )
+
+			self.__login( username, password )
+
+		return self.loginResult
+
+	##
+	## Perform the login handshake and replace the current session, if any.
+	##
+	def __login(self, username=None, password=None):
+
+		with self.loginLock:
+
 			# Fetch the API info from the controller. (Does not require login.)
 			apiInfo = self.getApiInfo()
 
@@ -336,32 +950,39 @@ class Omada:
 				if self.config is None:
 					raise TypeError('username and password cannot be None')
 				try:
-					username = self.config['omada'].get('username')
-					password = self.config['omada'].get('password')
+					username = self.config[self.section].get('username')
+					password = self.config[self.section].get('password')
 				except:
 					raise
 
+			# Nothing cached from another session can be trusted.
+			if self.cache is not None:
+				self.cache.invalidate( scope=self.__cacheScope() )
+
 			# Perform the login request manually.
+			started = time.perf_counter()
 			response = self.session.post( self.__buildUrl('/login'), json={'username':username,'password':password} )
 			response.raise_for_status()
 
 			# Get the login response.
 			json = response.json()
-			if json['errorCode'] != 0:
-				raise OmadaError(json)
-
-			# Store the login result.
-			self.loginResult = json['result']
+			error = OmadaError(json) if json['errorCode'] != 0 else None
+			self.__observe( 'POST', '/login', {}, started, len(response.content), error )
+			if error is not None:
+				raise error
 
 			# Store CSRF token header.
 			self.session.headers.update({
-				"Csrf-Token": self.loginResult['token']
+				"Csrf-Token": json['result']['token']
 			})
 
-			# Get the current user info.
-			self.currentUser = self.getCurrentUser()
+			# Store the login result and the credentials to log in again with.
+			self.loginResult = json['result']
+			self.credentials = (username, password)
 
-		return self.loginResult
+			# Get the current user info and index the user's sites.
+			self.currentUser = self.getCurrentUser()
+			self.__indexSites()
 
 	##
 	## Log out of the current session. Return value is always None.
@@ -372,13 +993,54 @@ class Omada:
 
 		# Only try to log out if we're already logged in.
 		if self.loginResult is not None:
-			# Send the logout request.
-			result = self.__post( '/logout' )
+			# Send the logout request, unless the session belongs to the daemon.
+			if not self.borrowed:
+				result = self.__post( '/logout' )
 			# Clear the stored result.
 			self.loginResult = None
+			self.borrowed = False
+			if self.cache is not None:
+				self.cache.invalidate( scope=self.__cacheScope() )
 
 		return result
 
+	##
+	## Return the state of the logged-in session so it can be used by another instance.
+	##
+	def exportSession(self):
+		return {
+			'baseurl': self.baseurl,
+			'omadacId': self.omadacId,
+			'loginResult': self.loginResult,
+			'currentUser': self.currentUser,
+			'cookies': [{'name':cookie.name,'value':cookie.value,'domain':cookie.domain,'path':cookie.path} for cookie in self.session.cookies],
+		}
+
+	##
+	## Use the logged-in session state returned by exportSession().
+	##
+	def importSession(self, state):
+
+		if state['baseurl'] != self.baseurl:
+			raise ValueError(f'session is for "{state["baseurl"]}", not "{self.baseurl}"')
+
+		if self.cache is not None:
+			self.cache.invalidate( scope=self.__cacheScope() )
+
+		self.omadacId = state['omadacId']
+		self.loginResult = state['loginResult']
+		self.currentUser = state['currentUser']
+
+		for cookie in state['cookies']:
+			self.session.cookies.set( cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'] )
+
+		# Store CSRF token header.
+		self.session.headers.update({
+			"Csrf-Token": self.loginResult['token']
+		})
+
+		self.__indexSites()
+
 	##
 	## Returns the current login status.
 	##
@@ -391,6 +1053,23 @@ class Omada:
 	def getCurrentUser(self):
 		return self.__get( '/users/current' )
 
+	##
+	## Reload the current user and rebuild the site index.
+	##
+	def refreshSites(self):
+
+		if self.cache is not None:
+			self.cache.invalidate( '/users/current', self.__cacheScope() )
+
+		self.currentUser = self.getCurrentUser()
+		self.__indexSites()
+
+	##
+	## Returns the name of the site with the given key.
+	##
+	def getSiteName(self, key):
+		return self.siteNames[key]
+
 	##
 	## Returns the list of groups for the given site.
 	##
@@ -420,64 +1099,126 @@ class Omada:
 	##
 	## Returns the list of all sites.
 	##
-	def getSites(self):
-		return self.__geterator( f'/sites' )
+	def getSites(self, limit=None):
+		return self.__geterator( f'/sites', limit=limit )
 
 	##
 	## Returns the list of devices for given site.
 	##
-	def getSiteDevices(self, site=None):
-		return self.__get( f'/sites/{self.__findKey(site)}/devices' )
+	## Set 'typed' to return Device records instead of dicts.
+	##
+	def getSiteDevices(self, site=None, typed=False):
+		devices = self.__get( f'/sites/{self.__findKey(site)}/devices' )
+		if not typed: return devices
+		from . import records
+		return [records.Device(device) for device in devices]
+
+	##
+	## Returns the devices for all sites, tagged with 'site'.
+	##
+	def getAllSiteDevices(self, sites=None, concurrency=8, typed=False):
+		return self.__fanOut( self.getSiteDevices, sites, concurrency, typed=typed )
 
 	##
 	## Returns the list of active clients for given site.
 	##
-	def getSiteClients(self, site=None):
-		return self.__geterator( f'/sites/{self.__findKey(site)}/clients', params={'filters.active':'true'} )
+	## Set 'typed' to return Client records instead of dicts. A 'query' adds
+	## filters and sorting, and may replace the 'active' filter.
+	##
+	def getSiteClients(self, site=None, limit=None, typed=False, query=None):
+		from .query import Query
+		params = {'filters.active': 'true'}
+		params.update( Query(query).params )
+		clients = self.__geterator( f'/sites/{self.__findKey(site)}/clients', params=params, limit=limit )
+		if not typed: return clients
+		from . import records
+		return map( records.Client, clients )
 
 	##
-	## Returns the list of alerts for given site.
+	## Returns the active clients for all sites, tagged with 'site'.
 	##
-	def getSiteAlerts(self, site=None, archived=False, level=None, module=None, searchKey=None):
+	def getAllSiteClients(self, sites=None, concurrency=8, limit=None, typed=False):
+		return self.__fanOut( self.getSiteClients, sites, concurrency, limit=limit, typed=typed )
 
-		params = {'filters.archived': 'true' if archived else 'false'}
+	##
+	## Returns the active clients for the given sites as Columns (default: the current site).
+	##
+	def getSiteClientColumns(self, sites=None, concurrency=8, numeric=None, strings=None):
+		from .columns import Columns
+		numeric = Columns.ClientNumeric if numeric is None else numeric
+		strings = Columns.ClientStrings if strings is None else strings
+		return Columns.fromRecords( self.getAllSiteClients(sites or [self.site], concurrency), numeric, strings )
 
-		if level is not None:
-			if level not in ValidLevelFilters:
-				raise TypeError('invalid level filter')
-			params['filters.level'] = level
+	##
+	## Returns the devices for the given sites as Columns (default: the current site).
+	##
+	def getSiteDeviceColumns(self, sites=None, concurrency=8, numeric=None, strings=None):
+		from .columns import Columns
+		numeric = Columns.DeviceNumeric if numeric is None else numeric
+		strings = Columns.DeviceStrings if strings is None else strings
+		return Columns.fromRecords( self.getAllSiteDevices(sites or [self.site], concurrency), numeric, strings )
+
+	##
+	## Returns the list of alerts for given site.
+	##
+	## Set 'typed' to return Alert records instead of dicts. The 'level' and 'module'
+	## filters take a LevelFilter or ModuleFilter or its name. A 'query' adds any
+	## other filters and sorting.
+	##
+	## Set 'start' and/or 'end' to a datetime or a time in milliseconds to return only
+	## the alerts in that range. Only the pages in the range are fetched.
+	##
+	def getSiteAlerts(self, site=None, archived=False, level=None, module=None, searchKey=None, limit=None, typed=False, query=None, start=None, end=None):
 
-		if module is not None:
-			if level not in ValidModuleFilters:
-				raise TypeError('invalid module filter')
-			params['filters.module'] = module
+		from .query import Query
+		params = Query( query ).filter( archived=archived, level=level, module=module ).search( searchKey ).toParams()
+		path = f'/sites/{self.__findKey(site)}/alerts'
 
-		if searchKey is not None:
-			params['searchKey'] = searchKey
+		if start is None and end is None:
+			alerts = self.__geterator( path, params=params, limit=limit )
+		else:
+			alerts = islice( self.__timeRange(path, params, start, end), limit )
 
-		return self.__geterator( f'/sites/{self.__findKey(site)}/alerts', params=params )
+		if not typed: return alerts
+		from . import records
+		return map( records.Alert, alerts )
 
 	##
-	## Returns the list of events for given site.
+	## Returns the alerts for all sites, tagged with 'site'.
 	##
-	def getSiteEvents(self, site=None, level=None, module=None, searchKey=None):
+	def getAllSiteAlerts(self, sites=None, concurrency=8, **kwargs):
+		return self.__fanOut( self.getSiteAlerts, sites, concurrency, **kwargs )
 
-		params = {}
+	##
+	## Returns the list of events for given site.
+	##
+	## Set 'typed' to return Event records instead of dicts. The 'level' and 'module'
+	## filters take a LevelFilter or ModuleFilter or its name. A 'query' adds any
+	## other filters and sorting.
+	##
+	## Set 'start' and/or 'end' to a datetime or a time in milliseconds to return only
+	## the events in that range. Only the pages in the range are fetched.
+	##
+	def getSiteEvents(self, site=None, level=None, module=None, searchKey=None, limit=None, typed=False, query=None, start=None, end=None):
 
-		if level is not None:
-			if level not in ValidLevelFilters:
-				raise TypeError('invalid level filter')
-			params['filters.level'] = level
+		from .query import Query
+		params = Query( query ).filter( level=level, module=module ).search( searchKey ).toParams()
+		path = f'/sites/{self.__findKey(site)}/events'
 
-		if module is not None:
-			if module not in ValidModuleFilters:
-				raise TypeError('invalid module filter')
-			params['filters.module'] = module
+		if start is None and end is None:
+			events = self.__geterator( path, params=params, limit=limit )
+		else:
+			events = islice( self.__timeRange(path, params, start, end), limit )
 
-		if searchKey is not None:
-			params['searchKey'] = searchKey
+		if not typed: return events
+		from . import records
+		return map( records.Event, events )
 
-		return self.__geterator( f'/sites/{self.__findKey(site)}/events', params=params )
+	##
+	## Returns the events for all sites, tagged with 'site'.
+	##
+	def getAllSiteEvents(self, sites=None, concurrency=8, **kwargs):
+		return self.__fanOut( self.getSiteEvents, sites, concurrency, **kwargs )
 
 	##
 	## Returns the notification settings for given site.
@@ -497,6 +1238,13 @@ class Omada:
 	def setSiteSettings(self, settings, site=None):
 		return self.__patch( f'/sites/{self.__findKey(site)}/setting', json=settings )
 
+	##
+	## Returns a handle on the site settings that only sends what changed.
+	##
+	def siteSettings(self, site=None):
+		from .settings import SettingsHandle
+		return SettingsHandle( lambda: self.getSiteSettings(site), lambda settings: self.setSiteSettings(settings, site) )
+
 	##
 	## Returns the list of settings for the controller.
 	##
@@ -509,6 +1257,13 @@ class Omada:
 	def setControllerSettings(self, settings):
 		return self.__patch( f'/controller/setting', json=settings )
 
+	##
+	## Returns a handle on the controller settings that only sends what changed.
+	##
+	def controllerSettings(self):
+		from .settings import SettingsHandle
+		return SettingsHandle( self.getControllerSettings, self.setControllerSettings )
+
 
 	def setControllerJksCertificate(self, jks_path, password):
 		return self.__setControllerCertificate(cert_type="JKS",
@@ -549,9 +1304,8 @@ class Omada:
 						  'controller/key',
 						  {"keyName": os.path.basename(key_path)})
 
-		# re-upload same settings to force cert file validation
-		settings = self.getControllerSettings()
-		cert_settings = settings['certificate']
+		# re-upload the certificate settings to force cert file validation
+		cert_settings = self.getControllerSettings()['certificate']
 		cert_settings['cerType'] = cert_type
 		cert_settings['enable'] = True
 		if key_password:
@@ -562,7 +1316,8 @@ class Omada:
 			# Delete PEM key file details if they exist
 			cert_settings.pop('keyId', None)
 			cert_settings.pop('keyName', None)
-		return self.setControllerSettings(settings)
+		# only the certificate section needs to be sent, even if unchanged
+		return self.setControllerSettings( {'certificate': cert_settings} )
 			
 
 	def reboot(self):
@@ -0,0 +1,110 @@
+from datetime import datetime
+from enum import Enum
+
+##
+## Return a time as milliseconds since the epoch, accepting a datetime or a number of milliseconds.
+##
+def timeMillis(value):
+	if isinstance(value, datetime):
+		return int( value.timestamp() * 1000 )
+	return int( value )
+
+##
+## Return the name of a level or module filter, accepting the enum or its name.
+##
+def filterName(name, value):
+
+	# Imported here since omada.omada imports this module.
+	from .omada import Omada
+
+	enum = Omada.LevelFilter if name == 'level' else Omada.ModuleFilter
+
+	if isinstance(value, enum):
+		return value.name
+
+	if value in enum.__members__:
+		return value
+
+	raise TypeError(f'invalid {name} filter')
+
+##
+## Filter, sort, and time range parameters for paged endpoints.
+##
+## The parameters are sent to the controller, so records are filtered and sorted
+## there instead of being downloaded and filtered in Python. Each method returns
+## the query, so calls can be chained:
+##
+##   query = Query().level('Error').module(Omada.ModuleFilter.Device).between(start, end)
+##   for event in omada.getSiteEvents(query=query):
+##       ...
+##
+## filter() passes any 'filters.*' parameter through. True and False are sent as
+## 'true' and 'false', enums by name, and the 'level' and 'module' filters are
+## checked against LevelFilter and ModuleFilter.
+##
+class Query:
+
+	def __init__(self, query=None):
+		if isinstance(query, Query):
+			self.params = dict( query.params )
+		else:
+			self.params = dict( query or {} )
+
+	def __repr__(self):
+		return f'Query({self.params!r})'
+
+	##
+	## Add 'filters.<name>' parameters. Filters set to None are skipped.
+	##
+	def filter(self, **filters):
+
+		for name, value in filters.items():
+
+			if value is None:
+				continue
+
+			if name in ('level', 'module'):
+				value = filterName( name, value )
+			elif name in ('timeStart', 'timeEnd'):
+				value = timeMillis( value )
+			elif isinstance(value, bool):
+				value = 'true' if value else 'false'
+			elif isinstance(value, Enum):
+				value = value.name
+
+			self.params[f'filters.{name}'] = value
+
+		return self
+
+	def level(self, level):
+		return self.filter( level=level )
+
+	def module(self, module):
+		return self.filter( module=module )
+
+	##
+	## Only match records from 'start' to 'end', either of which may be None.
+	##
+	def between(self, start=None, end=None):
+		return self.filter( timeStart=start, timeEnd=end )
+
+	##
+	## Match records containing 'key' in the fields the controller searches.
+	##
+	def search(self, key):
+		if key is not None:
+			self.params['searchKey'] = key
+		return self
+
+	##
+	## Sort by a field, e.g. sort('time', descending=True).
+	##
+	def sort(self, field, descending=False):
+		self.params[f'sorts.{field}'] = 'desc' if descending else 'asc'
+		return self
+
+	##
+	## Return the parameters as a new dict.
+	##
+	def toParams(self):
+		return dict( self.params )
@@ -0,0 +1,110 @@
+import json
+
+##
+## A compact record decoded from an Omada API result.
+##
+## The common fields listed in 'Fields' are stored in slots and read as plain
+## attributes, e.g. client.mac. Every other field is kept as a compact JSON string
+## and only parsed the first time one of them is used, which saves a lot of memory
+## for large inventories. Records can also be read like the original dicts, e.g.
+## client['mac'] or client.get('ssid').
+##
+class Record:
+
+	Fields = ()
+	__slots__ = ('_extra',)
+
+	def __init__(self, data):
+
+		for field in self.Fields:
+			setattr( self, field, data.get(field) )
+
+		extra = {key: value for key, value in data.items() if key not in self.Fields}
+		self._extra = json.dumps( extra, separators=(',',':') ) if extra else None
+
+	##
+	## Return the rarely used fields as a dict, parsing them on first use.
+	##
+	def __extra(self):
+
+		if self._extra is None:
+			self._extra = {}
+		elif isinstance(self._extra, str):
+			self._extra = json.loads( self._extra )
+
+		return self._extra
+
+	##
+	## Look up fields that are not stored in slots.
+	##
+	def __getattr__(self, name):
+
+		if name.startswith('_'):
+			raise AttributeError(name)
+
+		try:
+			return self.__extra()[name]
+		except KeyError:
+			raise AttributeError(f'{type(self).__name__} has no field "{name}"') from None
+
+	def __getitem__(self, name):
+		try:
+			return getattr( self, name )
+		except AttributeError:
+			raise KeyError(name) from None
+
+	def __setitem__(self, name, value):
+		if name in self.Fields:
+			setattr( self, name, value )
+		else:
+			self.__extra()[name] = value
+
+	def __contains__(self, name):
+		return name in self.Fields or name in self.__extra()
+
+	def get(self, name, default=None):
+		try:
+			return self[name]
+		except KeyError:
+			return default
+
+	##
+	## Return all fields as a plain dict.
+	##
+	def toDict(self):
+		data = {field: getattr(self, field) for field in self.Fields}
+		data.update( self.__extra() )
+		return data
+
+	def __repr__(self):
+		fields = ', '.join( f'{field}={getattr(self, field)!r}' for field in self.Fields[:4] )
+		return f'{type(self).__name__}({fields}, ...)'
+
+##
+## A client from getSiteClients().
+##
+class Client(Record):
+	Fields = ('site', 'mac', 'name', 'ip', 'active', 'wireless', 'connectDevType', 'apName', 'apMac', 'ssid', 'networkName',
+		'switchName', 'port', 'activity', 'trafficDown', 'trafficUp', 'uptime', 'lastSeen')
+	__slots__ = Fields
+
+##
+## A device from getSiteDevices().
+##
+class Device(Record):
+	Fields = ('site', 'mac', 'name', 'ip', 'type', 'model', 'showModel', 'version', 'status', 'uptimeLong')
+	__slots__ = Fields
+
+##
+## An event from getSiteEvents().
+##
+class Event(Record):
+	Fields = ('site', 'id', 'time', 'level', 'module', 'content')
+	__slots__ = Fields
+
+##
+## An alert from getSiteAlerts().
+##
+class Alert(Record):
+	Fields = ('site', 'id', 'time', 'level', 'module', 'content', 'archived')
+	__slots__ = Fields
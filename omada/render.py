@@ -0,0 +1,86 @@
+import re
+
+##
+## Render the content of events and alerts with names instead of MAC addresses.
+##
+## Event and alert content refers to clients and devices with tags such as
+## '[client:AA-BB-CC-DD-EE-FF]' and '[device:AA-BB-CC-DD-EE-FF]', and each record
+## carries the names in 'clientNames' and 'deviceNames'. Every tag is replaced by
+## '[name]' in a single regex pass per record.
+##
+## Names are also kept in a cache shared by all records, so a tag whose record
+## lacks the name can still be resolved from an earlier record. Tags with no known
+## name are left as they are. The cache is cleared once it holds 'maxsize' names.
+##
+##   renderer = ContentRenderer()
+##   for event in renderer.renderAll( omada.getSiteEvents() ):
+##       print( event['content'] )
+##
+class ContentRenderer:
+
+	Tag = re.compile( r'\[([a-z]+):([0-9A-Fa-f\-]+)\]' )
+
+	def __init__(self, maxsize=65536):
+		self.maxsize = maxsize
+		self.clientNames = {}
+		self.deviceNames = {}
+
+	##
+	## Add the names carried by a record to the cache.
+	##
+	def learn(self, record):
+
+		if len(self.clientNames) + len(self.deviceNames) > self.maxsize:
+			self.clientNames.clear()
+			self.deviceNames.clear()
+
+		names = record.get( 'clientNames' )
+		if names: self.clientNames.update( names )
+
+		names = record.get( 'deviceNames' )
+		if names: self.deviceNames.update( names )
+
+	##
+	## Return the content of a record with its tags replaced by names.
+	##
+	def render(self, record, learn=True):
+
+		content = record.get( 'content' )
+		if not content or '[' not in content:
+			return content
+
+		if learn:
+			self.learn( record )
+
+		clientNames = self.clientNames
+		deviceNames = self.deviceNames
+
+		def replace(match):
+			names = clientNames if match.group(1) == 'client' else deviceNames
+			name = names.get( match.group(2) )
+			return match.group(0) if name is None else f'[{name}]'
+
+		return self.Tag.sub( replace, content )
+
+	##
+	## Yield each record with its content rendered in place.
+	##
+	def renderAll(self, records):
+		for record in records:
+			if 'content' in record:
+				record['content'] = self.render( record )
+			yield record
+
+	##
+	## Return the rendered content of a batch of records.
+	##
+	## All names in the batch are learned first, so a tag can be resolved by any
+	## record in the batch.
+	##
+	def renderBatch(self, records):
+
+		records = list( records )
+		for record in records:
+			self.learn( record )
+
+		return [self.render(record, False) for record in records]
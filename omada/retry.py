@@ -0,0 +1,86 @@
+import time
+import random
+from threading import Lock
+
+##
+## Raised instead of sending a request while a controller's circuit is open.
+##
+class CircuitOpenError(ConnectionError):
+	pass
+
+##
+## How failed requests are retried.
+##
+## Requests that fail with a connection error, a timeout, or one of 'statusCodes'
+## are retried up to 'retries' times, waiting an exponentially growing delay with
+## full jitter between attempts. Writes are only retried when the request was
+## rejected before it could be applied, i.e. after logging in again.
+##
+## Responses with an errorCode in 'reloginCodes' (or HTTP 401) mean the session has
+## expired, so the client logs in again and repeats the request.
+##
+## After 'breakerThreshold' consecutive failures the circuit opens and requests fail
+## immediately for 'breakerTimeout' seconds, after which one trial request is let
+## through to test the controller.
+##
+class RetryPolicy:
+
+	def __init__(self, retries=3, backoff=0.5, maxBackoff=30.0, statusCodes=(429,500,502,503,504), reloginCodes=(-1200,), breakerThreshold=5, breakerTimeout=30.0):
+		self.retries = retries
+		self.backoff = backoff
+		self.maxBackoff = maxBackoff
+		self.statusCodes = frozenset(statusCodes)
+		self.reloginCodes = frozenset(reloginCodes)
+		self.breakerThreshold = breakerThreshold
+		self.breakerTimeout = breakerTimeout
+
+	##
+	## Return the delay in seconds before the given retry attempt (starting at 0).
+	##
+	def delay(self, attempt):
+		return random.uniform( 0, min(self.maxBackoff, self.backoff * (2 ** attempt)) )
+
+##
+## A circuit breaker that stops requests to a controller that keeps failing.
+##
+class CircuitBreaker:
+
+	def __init__(self, threshold=5, timeout=30.0):
+		self.threshold = threshold
+		self.timeout = timeout
+		self.failures = 0
+		self.openedAt = None
+		self.lock = Lock()
+
+	##
+	## Return True if the circuit is open and requests should not be sent.
+	##
+	@property
+	def isOpen(self):
+		return self.openedAt is not None and time.monotonic() - self.openedAt < self.timeout
+
+	##
+	## Raise CircuitOpenError if requests should not be sent right now.
+	##
+	## Once the timeout has passed, one trial request is let through and the
+	## circuit stays open for everyone else until that request finishes.
+	##
+	def check(self, name=''):
+		with self.lock:
+			if self.openedAt is None:
+				return
+			if time.monotonic() - self.openedAt < self.timeout:
+				raise CircuitOpenError(f'circuit open for {name or "controller"} after {self.failures} failures')
+			# half-open: restart the timer so only this request goes through
+			self.openedAt = time.monotonic()
+
+	def success(self):
+		with self.lock:
+			self.failures = 0
+			self.openedAt = None
+
+	def failure(self):
+		with self.lock:
+			self.failures += 1
+			if self.threshold and self.failures >= self.threshold:
+				self.openedAt = time.monotonic()
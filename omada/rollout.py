@@ -0,0 +1,183 @@
+import copy
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .settings import diff
+
+#define Logger for class-wide usage
+logger = logging.getLogger(__name__)
+
+##
+## Raised when a site's settings do not read back as written.
+##
+class VerifyError(Exception):
+
+	def __init__(self, site, changes):
+		self.site = site
+		self.changes = changes
+
+	def __str__(self):
+		return f'settings for site "{self.site}" did not read back as written: {self.changes}'
+
+##
+## The outcome of a rollout.
+##
+## 'applied' lists the sites that were changed, 'unchanged' the sites the transform
+## left as they were, and 'failed' maps each failed site to its exception. If the
+## failure threshold was passed, 'aborted' is True, 'rolledBack' lists the sites
+## restored to their baseline, and 'rollbackFailed' maps each site that could not
+## be restored, or did not read back as restored, to its exception.
+##
+class RolloutResult:
+
+	def __init__(self):
+		self.applied = []
+		self.unchanged = []
+		self.failed = OrderedDict()
+		self.rolledBack = []
+		self.rollbackFailed = OrderedDict()
+		self.aborted = False
+
+	@property
+	def ok(self):
+		return not self.failed and not self.aborted
+
+	def __repr__(self):
+		return f'RolloutResult(applied={len(self.applied)}, unchanged={len(self.unchanged)}, failed={list(self.failed)}, rolledBack={len(self.rolledBack)}, rollbackFailed={list(self.rollbackFailed)}, aborted={self.aborted})'
+
+##
+## Apply a settings change to many sites concurrently.
+##
+## 'transform' is called as transform(settings, site) with each site's settings
+## document and edits it in place. Only the parts that changed are sent, and with
+## 'verify' the settings are read back to check they took effect.
+##
+## Sites are processed in batches of 'batchSize' (default: all at once) by up to
+## 'workers' threads. If more than 'failureThreshold' sites fail, no more batches
+## are started and every site changed so far is restored to the settings it had
+## before the rollout. Restored sites are always read back, since a PATCH cannot
+## remove a key the transform added.
+##
+##   rollout = Rollout(omada, lambda settings, site: settings['led'].update(enable=False))
+##   result = rollout.run()
+##
+class Rollout:
+
+	def __init__(self, omada, transform, sites=None, workers=8, batchSize=None, failureThreshold=0, verify=True):
+		self.omada = omada
+		self.transform = transform
+		self.sites = sites
+		self.workers = workers
+		self.batchSize = batchSize
+		self.failureThreshold = failureThreshold
+		self.verify = verify
+		self.handles = {}
+		self.baselines = {}
+		self.changes = {}
+
+	##
+	## Return True if every value in 'changes' is present in 'settings'.
+	##
+	def __matches(self, settings, changes):
+		if isinstance(changes, dict):
+			return isinstance(settings, dict) and all( key in settings and self.__matches(settings[key], value) for key, value in changes.items() )
+		return settings == changes
+
+	##
+	## Apply the transform to one site. Returns True if the site was changed.
+	##
+	def __apply(self, site):
+
+		handle = self.omada.siteSettings( site )
+		self.baselines[site] = copy.deepcopy( handle.baseline )
+		self.transform( handle.settings, site )
+
+		changes = handle.changes()
+		if changes is None:
+			return False
+
+		handle.commit()
+		self.handles[site] = handle
+		self.changes[site] = changes
+
+		if self.verify:
+			settings = self.omada.getSiteSettings( site )
+			if not self.__matches( settings, changes ):
+				raise VerifyError( site, changes )
+
+		return True
+
+	##
+	## Restore one site to its baseline, sending only what differs.
+	##
+	## The settings the rollout changed are read back and must match the baseline,
+	## including keys the rollout added being gone.
+	##
+	def __restore(self, site):
+
+		baseline = self.baselines[site]
+		handle = self.handles[site]
+		handle.settings = copy.deepcopy( baseline )
+		handle.commit()
+
+		settings = self.omada.getSiteSettings( site )
+		missing = object()
+		remaining = {}
+		for key in self.changes[site]:
+			value = settings.get( key, missing )
+			if key not in baseline:
+				if value is not missing:
+					remaining[key] = value
+			elif value is missing or diff( baseline[key], value ) is not None:
+				remaining[key] = None if value is missing else value
+
+		if remaining:
+			raise VerifyError( site, remaining )
+
+	##
+	## Run the rollout and return a RolloutResult.
+	##
+	def run(self):
+
+		result = RolloutResult()
+		self.handles = {}
+		self.baselines = {}
+		self.changes = {}
+		sites = self.sites if self.sites is not None else [site['name'] for site in self.omada.getSites()]
+		batchSize = self.batchSize or len(sites) or 1
+
+		with ThreadPoolExecutor( max_workers=max(1, self.workers) ) as executor:
+
+			for start in range(0, len(sites), batchSize):
+
+				batch = sites[start:start+batchSize]
+				futures = [(site, executor.submit(self.__apply, site)) for site in batch]
+
+				for site, future in futures:
+					try:
+						if future.result():
+							result.applied.append( site )
+						else:
+							result.unchanged.append( site )
+					except Exception as ex:
+						logger.warning( f'rollout failed for site "{site}": {ex}' )
+						result.failed[site] = ex
+
+				if len(result.failed) > self.failureThreshold:
+					result.aborted = True
+					break
+
+			if result.aborted:
+				# Sites that failed verification were written too.
+				written = [site for site in sites if site in self.handles]
+				futures = [(site, executor.submit(self.__restore, site)) for site in written]
+				for site, future in futures:
+					try:
+						future.result()
+						result.rolledBack.append( site )
+					except Exception as ex:
+						logger.error( f'rollback failed for site "{site}": {ex}' )
+						result.rollbackFailed[site] = ex
+
+		return result
@@ -0,0 +1,90 @@
+import copy
+
+##
+## Return the parts of 'current' that differ from 'baseline', or None if nothing changed.
+##
+## Dicts are compared key by key and only changed keys are kept, recursively. Any
+## other value is compared as a whole. Keys cannot be deleted with a PATCH, so if a
+## dict lost keys it is returned in full, as the original code would have sent it.
+##
+def diff(baseline, current):
+
+	if isinstance(baseline, dict) and isinstance(current, dict):
+
+		if any( key not in current for key in baseline ):
+			return current
+
+		changes = {}
+		for key, value in current.items():
+			if key not in baseline:
+				changes[key] = value
+			else:
+				change = diff( baseline[key], value )
+				if change is not None:
+					changes[key] = change
+
+		return changes or None
+
+	return None if baseline == current else current
+
+##
+## A settings document that remembers what it was when fetched.
+##
+## Edit it like the dict returned by getSiteSettings() or getControllerSettings(),
+## then call commit() to send only the changed parts. If nothing changed, no
+## request is made at all.
+##
+##   settings = omada.siteSettings()
+##   settings['led']['enable'] = False
+##   settings.commit()   # PATCH {"led": {"enable": false}}
+##
+class SettingsHandle:
+
+	def __init__(self, getter, setter):
+		self.getter = getter
+		self.setter = setter
+		self.refresh()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, type, value, traceback):
+		if type is None:
+			self.commit()
+
+	def __getitem__(self, key):
+		return self.settings[key]
+
+	def __setitem__(self, key, value):
+		self.settings[key] = value
+
+	def __contains__(self, key):
+		return key in self.settings
+
+	##
+	## Fetch the settings again and make them the new baseline.
+	##
+	def refresh(self):
+		self.baseline = self.getter()
+		self.settings = copy.deepcopy( self.baseline )
+
+	##
+	## Return the changes made since the baseline was fetched, or None.
+	##
+	def changes(self):
+		return diff( self.baseline, self.settings )
+
+	##
+	## Send the changes, if any, and make the edited settings the new baseline.
+	##
+	## Returns True if a request was sent and False if there was nothing to send.
+	##
+	def commit(self):
+
+		changes = self.changes()
+		if changes is None:
+			return False
+
+		self.setter( changes )
+		self.baseline = copy.deepcopy( self.settings )
+		return True
@@ -0,0 +1,131 @@
+import json
+import codecs
+
+##
+## Incrementally parse a paged Omada response from a stream of byte chunks.
+##
+## Iterating yields each item of 'result.data' as soon as it has been decoded, so
+## only one item and one chunk are held in memory at a time. Everything else in
+## the response is collected as it goes by: 'errorCode' and 'msg' in 'response',
+## and 'totalRows', 'currentPage', 'currentSize' and the like in 'result'.
+##
+## This expects the usual shape of an Omada response:
+##
+##   {"errorCode":0, "msg":"...", "result":{"totalRows":..., "data":[{...}, ...]}}
+##
+class PageStream:
+
+	decoder = json.JSONDecoder()
+
+	def __init__(self, chunks):
+		self.chunks = iter( chunks )
+		self.text = codecs.getincrementaldecoder('utf-8')()
+		self.buffer = ''
+		self.pos = 0
+		self.eof = False
+		self.response = {}
+		self.result = {}
+
+	##
+	## Read the next chunk into the buffer, dropping what has already been parsed.
+	##
+	def __fill(self):
+
+		chunk = next( self.chunks, None )
+		if chunk is None:
+			self.eof = True
+			chunk = b''
+
+		self.buffer = self.buffer[self.pos:] + self.text.decode( chunk, final=self.eof )
+		self.pos = 0
+
+	##
+	## Return the next character after any whitespace without consuming it.
+	##
+	def __peek(self):
+
+		while True:
+			while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+				self.pos += 1
+			if self.pos < len(self.buffer):
+				return self.buffer[self.pos]
+			if self.eof:
+				raise ValueError('unexpected end of response')
+			self.__fill()
+
+	##
+	## Consume the next character after any whitespace, which must be one of 'chars'.
+	##
+	def __expect(self, chars):
+		char = self.__peek()
+		if char not in chars:
+			raise ValueError(f'expected {chars!r} at {char!r}')
+		self.pos += 1
+		return char
+
+	##
+	## Decode the next complete JSON value.
+	##
+	def __value(self):
+
+		self.__peek()
+
+		while True:
+			try:
+				value, end = PageStream.decoder.raw_decode( self.buffer, self.pos )
+				# A number may continue in the next chunk, e.g. '3.' before '25', so it is
+				# only complete once a delimiter follows it or the response has ended.
+				number = self.buffer[self.pos] in '-0123456789'
+				if self.eof or (end < len(self.buffer) and (not number or self.buffer[end] in ' \t\r\n,]}')):
+					self.pos = end
+					return value
+			except json.JSONDecodeError:
+				if self.eof: raise
+			self.__fill()
+
+	##
+	## Parse the members of an object, calling 'member' for each key.
+	##
+	def __object(self, member):
+
+		self.__expect( '{' )
+		if self.__peek() == '}':
+			self.pos += 1
+			return
+
+		while True:
+			key = self.__value()
+			self.__expect( ':' )
+			yield from member( key )
+			if self.__expect( ',}' ) == '}':
+				return
+
+	def __responseMember(self, key):
+		if key == 'result' and self.__peek() == '{':
+			yield from self.__object( self.__resultMember )
+		else:
+			self.response[key] = self.__value()
+
+	def __resultMember(self, key):
+		if key == 'data' and self.__peek() == '[':
+			yield from self.__array()
+		else:
+			self.result[key] = self.__value()
+
+	##
+	## Yield each element of an array.
+	##
+	def __array(self):
+
+		self.__expect( '[' )
+		if self.__peek() == ']':
+			self.pos += 1
+			return
+
+		while True:
+			yield self.__value()
+			if self.__expect( ',]' ) == ']':
+				return
+
+	def __iter__(self):
+		return self.__object( self.__responseMember )
@@ -0,0 +1,100 @@
+import os
+import json
+from threading import Lock
+
+##
+## Fetch only the events and alerts that are new since the last sync.
+##
+## The controller returns events and alerts newest first, so paging stops as soon
+## as a record at or before the saved high-water mark is reached. The mark is the
+## newest 'time' seen for each site, plus the ids seen at that time, since several
+## records can share a timestamp. Marks are saved to the JSON file at 'path' after
+## every sync so they survive between runs.
+##
+class EventSync:
+
+	def __init__(self, omada, path='omada-sync.json'):
+		self.omada = omada
+		self.path = path
+		self.lock = Lock()
+		self.marks = {}
+
+		if os.path.isfile( path ):
+			with open( path, 'r', encoding='utf-8' ) as fh:
+				self.marks = json.load( fh )
+
+	##
+	## Write the marks to disk, replacing the old file in one step.
+	##
+	def __save(self):
+		temp = self.path + '.tmp'
+		with open( temp, 'w', encoding='utf-8' ) as fh:
+			json.dump( self.marks, fh )
+		os.replace( temp, self.path )
+
+	##
+	## Return the records from 'fetch' that are newer than the mark for 'key' and advance the mark.
+	##
+	## On the first sync, 'fetch' is asked for the newest 'limit' records. After that
+	## every new record is fetched, only the oldest 'limit' are returned, and the mark
+	## only moves up to the newest record returned, so the rest come next time.
+	##
+	def __sync(self, key, fetch, limit=None):
+
+		mark = self.marks.get( key )
+		markTime = mark['time'] if mark else None
+		markIds = set( mark['ids'] ) if mark else set()
+
+		delta = []
+		for record in fetch( limit if mark is None else None ):
+			time = record['time']
+			if markTime is not None:
+				if time < markTime: break
+				if time == markTime and record.get('id') in markIds: continue
+			delta.append( record )
+
+		# oldest first, in the order they happened
+		delta.reverse()
+		if limit is not None:
+			delta = delta[:limit]
+
+		if delta:
+			newest = max( record['time'] for record in delta )
+			ids = {record.get('id') for record in delta if record['time'] == newest}
+			if newest == markTime:
+				ids |= markIds
+			with self.lock:
+				self.marks[key] = {'time': newest, 'ids': sorted( id for id in ids if id is not None )}
+				self.__save()
+
+		return delta
+
+	##
+	## Returns the events for the given site that are new since the last sync, oldest first.
+	##
+	## On the first sync every event is new, and 'limit' caps how many are fetched.
+	## After that, 'limit' caps how many are returned at once; the oldest come first
+	## and the rest are returned by the next sync.
+	##
+	def syncEvents(self, site=None, limit=None, **kwargs):
+		key = 'events:' + (site or self.omada.site)
+		return self.__sync( key, lambda limit: self.omada.getSiteEvents(site, limit=limit, **kwargs), limit )
+
+	##
+	## Returns the alerts for the given site that are new since the last sync, oldest first.
+	##
+	def syncAlerts(self, site=None, limit=None, **kwargs):
+		key = 'alerts:' + (site or self.omada.site)
+		return self.__sync( key, lambda limit: self.omada.getSiteAlerts(site, limit=limit, **kwargs), limit )
+
+	##
+	## Forget the mark for a site, or for every site, so the next sync starts over.
+	##
+	def reset(self, site=None):
+		with self.lock:
+			if site is None:
+				self.marks.clear()
+			else:
+				self.marks.pop( 'events:' + site, None )
+				self.marks.pop( 'alerts:' + site, None )
+			self.__save()
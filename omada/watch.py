@@ -0,0 +1,110 @@
+from collections import namedtuple
+from threading import Event
+
+##
+## A change in client presence.
+##
+## 'type' is one of ClientWatch.Join, Leave, Roam or IpChange. 'client' is the
+## latest client record (the last one seen for Leave) and 'previous' is the
+## (location, ip) pair it had before, or None for Join.
+##
+PresenceEvent = namedtuple( 'PresenceEvent', ('type', 'site', 'mac', 'client', 'previous') )
+
+##
+## Poll the clients of one or more sites and report only what changed.
+##
+## The last snapshot is kept as a MAC-keyed index of (location, ip) pairs, where
+## the location is the AP for wireless clients and the switch port for wired ones.
+## Each poll compares the new client list with the index and produces join, leave,
+## roam and IP change events.
+##
+## The polling interval adapts between 'minInterval' and 'maxInterval': it halves
+## after a poll with changes and grows by half after a quiet one.
+##
+class ClientWatch:
+
+	Join     = 'join'
+	Leave    = 'leave'
+	Roam     = 'roam'
+	IpChange = 'ip'
+
+	def __init__(self, omada, sites=None, interval=30, minInterval=5, maxInterval=300, concurrency=8):
+		self.omada = omada
+		self.sites = sites or [omada.site]
+		self.interval = interval
+		self.minInterval = minInterval
+		self.maxInterval = maxInterval
+		self.concurrency = concurrency
+		self.index = None
+		self.clients = {}
+		self.stopped = Event()
+
+	##
+	## Return where a client is connected: its AP, or its switch and port.
+	##
+	@staticmethod
+	def location(client):
+		if client.get('wireless') or client.get('connectDevType') == 'ap':
+			return ('ap', client.get('apMac') or client.get('apName'))
+		return ('port', client.get('switchMac') or client.get('switchName'), client.get('port'))
+
+	##
+	## Fetch the clients once and return the list of changes since the last poll.
+	##
+	## The first poll only records the baseline and returns no changes.
+	##
+	def poll(self):
+
+		index = {}
+		clients = {}
+		for client in self.omada.getAllSiteClients( self.sites, self.concurrency ):
+			key = (client['site'], client['mac'])
+			index[key] = (self.location(client), client.get('ip'))
+			clients[key] = client
+
+		events = []
+		if self.index is not None:
+
+			for key, state in index.items():
+				previous = self.index.get( key )
+				if previous is None:
+					events.append( PresenceEvent(ClientWatch.Join, key[0], key[1], clients[key], None) )
+				else:
+					if state[0] != previous[0]:
+						events.append( PresenceEvent(ClientWatch.Roam, key[0], key[1], clients[key], previous) )
+					if state[1] != previous[1]:
+						events.append( PresenceEvent(ClientWatch.IpChange, key[0], key[1], clients[key], previous) )
+
+			for key, previous in self.index.items():
+				if key not in index:
+					events.append( PresenceEvent(ClientWatch.Leave, key[0], key[1], self.clients.get(key), previous) )
+
+		self.index = index
+		self.clients = clients
+		return events
+
+	##
+	## Poll until stopped and yield each change as it is found.
+	##
+	def watch(self):
+
+		while not self.stopped.is_set():
+
+			events = self.poll()
+			yield from events
+
+			if events:
+				self.interval = max( self.minInterval, self.interval / 2 )
+			else:
+				self.interval = min( self.maxInterval, self.interval * 1.5 )
+
+			self.stopped.wait( self.interval )
+
+	def __iter__(self):
+		return self.watch()
+
+	##
+	## Stop watching after the current poll.
+	##
+	def stop(self):
+		self.stopped.set()
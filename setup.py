@@ -4,7 +4,7 @@ from setuptools import setup, find_packages
 with open( 'README.md', 'r', encoding='utf-8' ) as fh:
 	README = fh.read()
 
-setuptools.setup(
+setup(
 	name='omada-api',
 	version='5.7.4',
 	description='A simple Python wrapper for the TP-Link Omada Software Controller API',
@@ -32,5 +32,12 @@ setuptools.setup(
 	install_requires=[
 		'requests>=2.28.0'
 	],
+	extras_require={
+		'async': ['aiohttp>=3.8.0'],
+		'numpy': ['numpy'],
+	},
+	entry_points={
+		'console_scripts': ['omada = omada.cli:main'],
+	},
 	python_requires='>=3.7',
 )